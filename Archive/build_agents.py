@@ -4,34 +4,83 @@ Build script for Ouro-C Python agents using Kybra CDK.
 Compiles Python agents to WebAssembly for ICP deployment.
 """
 
-import subprocess
+import concurrent.futures
 import os
+import subprocess
 import sys
 from pathlib import Path
 
-def run_command(cmd, cwd=None):
-    """Run a command and return the result."""
-    print(f"Running: {cmd}")
+def run_command(argv, cwd=None, log_path=None):
+    """Run an argv-list command, streaming output to a log file.
+
+    No shell is forked and output is written line-by-line instead of being
+    buffered whole in memory; returns (success, log_path or tail).
+    """
+    cmd_display = " ".join(str(a) for a in argv)
+    print(f"Running: {cmd_display}")
+    tail = []
     try:
-        result = subprocess.run(
-            cmd,
-            shell=True,
+        proc = subprocess.Popen(
+            argv,
             cwd=cwd,
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
-            check=True
+            bufsize=1
         )
-        print(f"✅ Success: {cmd}")
-        return True, result.stdout
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Failed: {cmd}")
-        print(f"Error: {e.stderr}")
-        return False, e.stderr
+        log = open(log_path, "w") if log_path else None
+        try:
+            for line in proc.stdout:
+                if log is not None:
+                    log.write(line)
+                else:
+                    tail.append(line)
+        finally:
+            if log is not None:
+                log.close()
+        returncode = proc.wait()
+    except OSError as e:
+        print(f"❌ Failed: {cmd_display}")
+        print(f"Error: {e}")
+        return False, str(e)
+
+    if returncode == 0:
+        print(f"✅ Success: {cmd_display}")
+        return True, log_path or "".join(tail)
+
+    print(f"❌ Failed: {cmd_display}")
+    if log_path:
+        print(f"See log: {log_path}")
+    else:
+        print(f"Error: {''.join(tail[-20:])}")
+    return False, log_path or "".join(tail)
 
 def ensure_directory(path):
     """Ensure directory exists."""
     Path(path).mkdir(parents=True, exist_ok=True)
 
+def _check_syntax(source_path):
+    """Parse a source file, so typos fail fast instead of burning a Kybra compile."""
+    import ast
+    try:
+        ast.parse(Path(source_path).read_text(), filename=str(source_path))
+        return True
+    except SyntaxError as e:
+        print(f"❌ Syntax error in {source_path}: {e}")
+        return False
+
+def _build_one(name, source, output, project_root):
+    """Build a single agent from pre-resolved path strings; returns (success, name, size)."""
+    if not _check_syntax(source):
+        return False, name, 0
+
+    argv = ["python", "-m", "kybra", "compile", source, "-o", output]
+    success, _ = run_command(argv, cwd=project_root, log_path=f"{output}.log")
+
+    if success and os.path.exists(output):
+        return True, name, os.path.getsize(output)
+    return False, name, 0
+
 def main():
     """Build all Python agents for ICP deployment."""
     project_root = Path(__file__).parent
@@ -61,33 +110,38 @@ def main():
     success_count = 0
     total_count = len(agents)
 
+    # Resolve paths once in the parent; workers receive plain strings, so
+    # nothing heavier than a tuple of str crosses the process boundary
+    jobs = []
     for agent in agents:
         print(f"\n📦 Building {agent['name']}...")
         print(f"   Source: {agent['source']}")
         print(f"   Output: {agent['output']}")
 
         source_path = agents_dir / agent["source"]
-        output_path = target_dir / agent["output"]
-
-        # Check if source exists
         if not source_path.exists():
             print(f"❌ Source file not found: {source_path}")
             continue
-
-        # Compile with Kybra
-        cmd = f"python -m kybra compile {source_path} -o {output_path}"
-        success, output = run_command(cmd, cwd=project_root)
-
-        if success:
-            # Verify WASM file was created
-            if output_path.exists():
-                size = output_path.stat().st_size
-                print(f"✅ {agent['name']} built successfully ({size:,} bytes)")
-                success_count += 1
-            else:
-                print(f"❌ {agent['name']} build failed - WASM file not created")
-        else:
-            print(f"❌ {agent['name']} build failed")
+        jobs.append((agent["name"], str(source_path.resolve()),
+                     str((target_dir / agent["output"]).resolve())))
+
+    # The compiles are independent external processes, so fan them out and
+    # let the wall clock track the slowest build instead of the sum
+    if jobs:
+        workers = min(len(jobs), os.cpu_count() or 1)
+        project_root_str = str(project_root)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_build_one, name, source, output, project_root_str): name
+                for name, source, output in jobs
+            }
+            for future in concurrent.futures.as_completed(futures):
+                success, name, size = future.result()
+                if success:
+                    print(f"✅ {name} built successfully ({size:,} bytes)")
+                    success_count += 1
+                else:
+                    print(f"❌ {name} build failed")
 
     print("\n" + "=" * 60)
     print(f"📊 Build Summary: {success_count}/{total_count} agents built successfully")
@@ -19,8 +19,8 @@ from kybra import (
     ic, nat64, query, update, Principal, Record, Variant,
     Vec, Opt, bool, text, StableBTreeMap, Tuple
 )
-import json
-from datetime import datetime, timedelta
+import heapq
+from collections import Counter, deque, namedtuple
 from typing import Dict, List, Optional
 
 # Type definitions
@@ -32,7 +32,7 @@ class ContractMetrics(Record):
     average_gas_per_tx: nat64
     success_rate: nat64
     failure_rate: nat64
-    timestamp: text
+    timestamp: nat64  # Stored numeric: no text->int parse on read
 
 class TransactionPattern(Record):
     pattern_id: text
@@ -95,6 +95,92 @@ performance_benchmarks_storage = StableBTreeMap[text, PerformanceBenchmark](
     memory_id=4, max_key_size=50, max_value_size=300
 )
 
+# Secondary index of pending recommendation ids, so the pending query
+# reads only matching entries instead of scanning every recommendation
+pending_recommendations_index = StableBTreeMap[text, bool](
+    memory_id=5, max_key_size=100, max_value_size=10
+)
+
+def _store_recommendation(rec: OptimizationRecommendation):
+    """Insert a recommendation, keeping the pending index in step."""
+    optimization_recommendations_storage.insert(rec.recommendation_id, rec)
+    if rec.status == _T_PENDING:
+        pending_recommendations_index.insert(rec.recommendation_id, True)
+
+# Decoded view of a ContractMetrics record with every numeric field
+# already converted, so readers never re-parse text per query
+_ParsedMetrics = namedtuple("_ParsedMetrics", (
+    "total_transactions", "successful_transactions", "failed_transactions",
+    "total_gas_used", "average_gas_per_tx", "success_rate", "failure_rate",
+    "timestamp"
+))
+
+# Per-bucket cache of parsed records; record_transaction_metrics evicts
+# just the bucket it rewrites
+_parsed_cache: Dict[str, _ParsedMetrics] = {}
+
+# Rolling window of the last 100 buckets as (metrics_id, parsed) pairs,
+# maintained on write so pattern detection never re-walks stable storage
+_rolling_window: deque = deque(maxlen=100)
+
+# (bucket, metrics_id, key text) of the current 5-minute bucket; every
+# tx within the window reuses the formatted id and its text wrapper
+_last_bucket: Optional[tuple] = None
+
+# Write-behind buffer: bucket records accumulate on the heap and flush
+# to stable storage every _FLUSH_EVERY recordings, so most transactions
+# skip the stable-memory insert. Readers stay consistent because the
+# parsed cache serves the buffered state; at most one flush window of
+# updates is at risk if the canister traps between flushes.
+_FLUSH_EVERY = 20
+_dirty_metrics: Dict[str, tuple] = {}  # metrics_id -> (key, record)
+_flush_counter = 0
+
+def _flush_pending_metrics():
+    """Write all buffered bucket records to stable storage."""
+    for key, record in _dirty_metrics.values():
+        contract_metrics_storage.insert(key, record)
+    _dirty_metrics.clear()
+
+def _parsed_metrics(metrics_id: str) -> Optional[_ParsedMetrics]:
+    """Fetch one metrics bucket with its fields pre-converted to int."""
+    parsed = _parsed_cache.get(metrics_id)
+    if parsed is not None:
+        return parsed
+
+    m = contract_metrics_storage.get(text(metrics_id))
+    if m is None:
+        return None
+
+    parsed = _ParsedMetrics(
+        int(m.total_transactions),
+        int(m.successful_transactions),
+        int(m.failed_transactions),
+        int(m.total_gas_used),
+        int(m.average_gas_per_tx),
+        int(m.success_rate),
+        int(m.failure_rate),
+        int(m.timestamp)
+    )
+    _parsed_cache[metrics_id] = parsed
+    return parsed
+
+# Pre-built text constants for fixed tags: the hot constructors reuse
+# these instead of allocating a fresh wrapper for the same literal
+_T_PENDING = text("pending")
+_T_IMPLEMENTED = text("implemented")
+_T_HIGH = text("high")
+_T_MEDIUM = text("medium")
+_T_EASY = text("easy")
+_T_FAILURE_SPIKE = text("failure_spike")
+_T_REPEATED_ERROR = text("repeated_error")
+_T_SUCCESS_DECLINE = text("success_decline")
+_T_PARAMETER_TUNING = text("parameter_tuning")
+_T_GAS_OPTIMIZATION = text("gas_optimization")
+_T_BATCH_ADJUSTMENT = text("batch_adjustment")
+_T_INVESTIGATE_CONTRACT = text("Investigate contract state and external dependencies")
+_T_INVESTIGATE_PERFORMANCE = text("Investigate contract performance and external dependencies")
+
 # Monitoring configuration
 MONITORING_CONFIG = {
     "success_rate_threshold": 9500,  # 95%
@@ -104,16 +190,8 @@ MONITORING_CONFIG = {
     "recommendation_generation_interval": 3600  # 1 hour
 }
 
-def analyze_transaction_success_rate(recent_transactions: List[dict]) -> dict:
-    """
-    Analyze transaction success rate patterns.
-    This monitors how well the contract is performing its core function.
-    """
-    if len(recent_transactions) == 0:
-        return {"success_rate": 0, "trend": "no_data"}
-
-    successful = len([tx for tx in recent_transactions if tx["status"] == "success"])
-    total = len(recent_transactions)
+def _success_rate_result(successful: int, total: int) -> dict:
+    """Build the success-rate analysis from pre-counted scalars."""
     success_rate = int((successful / total) * 10000)
 
     # Compare with historical data
@@ -131,17 +209,20 @@ def analyze_transaction_success_rate(recent_transactions: List[dict]) -> dict:
         "sample_size": total
     }
 
-def analyze_gas_efficiency(recent_transactions: List[dict]) -> dict:
+def analyze_transaction_success_rate(recent_transactions: List[dict]) -> dict:
     """
-    Analyze gas efficiency of contract operations.
-    Monitors if batching and other optimizations are working correctly.
+    Analyze transaction success rate patterns.
+    This monitors how well the contract is performing its core function.
     """
     if len(recent_transactions) == 0:
-        return {"efficiency_score": 0, "average_gas": 0, "trend": "no_data"}
+        return {"success_rate": 0, "trend": "no_data"}
 
-    gas_costs = [tx.get("gas_used", 0) for tx in recent_transactions]
-    average_gas = sum(gas_costs) // len(gas_costs)
+    # Count without materializing a filtered list
+    successful = sum(tx["status"] == "success" for tx in recent_transactions)
+    return _success_rate_result(successful, len(recent_transactions))
 
+def _gas_efficiency_result(average_gas: int) -> dict:
+    """Build the gas-efficiency analysis from the precomputed average."""
     # Benchmark against expected values
     # Single transaction: ~50,000 gas
     # Batched transaction: ~150,000 gas for 10 payments = 15,000 per payment
@@ -169,48 +250,119 @@ def analyze_gas_efficiency(recent_transactions: List[dict]) -> dict:
         "trend": trend
     }
 
-def detect_failure_patterns(recent_transactions: List[dict]) -> List[TransactionPattern]:
+def analyze_gas_efficiency(recent_transactions: List[dict]) -> dict:
     """
-    Detect patterns in transaction failures.
-    Helps identify when the core principles aren't working correctly.
+    Analyze gas efficiency of contract operations.
+    Monitors if batching and other optimizations are working correctly.
+    """
+    if len(recent_transactions) == 0:
+        return {"efficiency_score": 0, "average_gas": 0, "trend": "no_data"}
+
+    # Single accumulation pass; no intermediate list of gas values
+    average_gas = sum(tx.get("gas_used", 0) for tx in recent_transactions) // len(recent_transactions)
+    return _gas_efficiency_result(average_gas)
+
+def _count_failures(recent_transactions: List[dict]):
+    """Tally failures and their error types in one pass.
+
+    Pure counting kernel kept free of Record construction so the hot
+    scan touches each transaction dict exactly once.
     """
+    failed_count = 0
+    error_types: Counter = Counter()
+    for tx in recent_transactions:
+        if tx["status"] == "failed":
+            failed_count += 1
+            error_types[tx.get("error_type", "unknown")] += 1
+    return failed_count, error_types
+
+def _patterns_from_counts(failed_count: int, error_types: Dict[str, int],
+                          total: int) -> List[TransactionPattern]:
+    """Build failure patterns from pre-counted scalars."""
     patterns = []
+    # Locals resolve via LOAD_FAST; the globals cost adds up per pattern
+    _text = text
+    _nat64 = nat64
+
+    # One time read per call; every pattern shares the stamp
+    now_str = str(ic.time())
+    now_text = _text(now_str)
 
     # Check for sudden spike in failures
-    failed_tx = [tx for tx in recent_transactions if tx["status"] == "failed"]
-    failure_rate = len(failed_tx) / max(1, len(recent_transactions))
+    failure_rate = failed_count / max(1, total)
 
     if failure_rate > 0.1:  # More than 10% failure rate
         patterns.append(TransactionPattern(
-            pattern_id=text(f"failure_spike_{ic.time()}"),
-            pattern_type=text("failure_spike"),
-            severity=text("high" if failure_rate > 0.2 else "medium"),
-            description=text(f"Sudden spike in transaction failures: {int(failure_rate * 100)}%"),
-            affected_transactions=nat64(len(failed_tx)),
-            detected_at=text(ic.time()),
-            recommendation=text("Investigate contract state and external dependencies")
+            pattern_id=_text("failure_spike_" + now_str),
+            pattern_type=_T_FAILURE_SPIKE,
+            severity=_T_HIGH if failure_rate > 0.2 else _T_MEDIUM,
+            description=_text(f"Sudden spike in transaction failures: {int(failure_rate * 100)}%"),
+            affected_transactions=_nat64(failed_count),
+            detected_at=now_text,
+            recommendation=_T_INVESTIGATE_CONTRACT
         ))
 
     # Check for specific error patterns
-    error_types = {}
-    for tx in failed_tx:
-        error_type = tx.get("error_type", "unknown")
-        error_types[error_type] = error_types.get(error_type, 0) + 1
-
     for error_type, count in error_types.items():
         if count > 3:  # Same error repeated multiple times
             patterns.append(TransactionPattern(
-                pattern_id=text(f"error_pattern_{error_type}_{ic.time()}"),
-                pattern_type=text("repeated_error"),
-                severity=text("medium"),
-                description=text(f"Repeated error type: {error_type} ({count} occurrences)"),
-                affected_transactions=nat64(count),
-                detected_at=text(ic.time()),
-                recommendation=text(f"Fix underlying issue causing {error_type}")
+                pattern_id=_text("error_pattern_" + error_type + "_" + now_str),
+                pattern_type=_T_REPEATED_ERROR,
+                severity=_T_MEDIUM,
+                description=_text(f"Repeated error type: {error_type} ({count} occurrences)"),
+                affected_transactions=_nat64(count),
+                detected_at=now_text,
+                recommendation=_text(f"Fix underlying issue causing {error_type}")
             ))
 
     return patterns
 
+def detect_failure_patterns(recent_transactions: List[dict]) -> List[TransactionPattern]:
+    """
+    Detect patterns in transaction failures.
+    Helps identify when the core principles aren't working correctly.
+    """
+    failed_count, error_types = _count_failures(recent_transactions)
+    return _patterns_from_counts(failed_count, error_types, len(recent_transactions))
+
+# Fused batch analysis: all three views from a single traversal
+_BatchAnalysis = namedtuple("_BatchAnalysis", (
+    "success_rate", "gas_efficiency", "failure_patterns"
+))
+
+def analyze_batch(recent_transactions: List[dict]) -> _BatchAnalysis:
+    """
+    Analyze a batch once for success rate, gas efficiency and failure
+    patterns. One loop replaces the three independent traversals the
+    separate analyzers would make over the same dicts.
+    """
+    total = len(recent_transactions)
+    if total == 0:
+        return _BatchAnalysis(
+            {"success_rate": 0, "trend": "no_data"},
+            {"efficiency_score": 0, "average_gas": 0, "trend": "no_data"},
+            []
+        )
+
+    successful = 0
+    gas_sum = 0
+    failed_count = 0
+    error_types: Counter = Counter()
+    for tx in recent_transactions:
+        status = tx["status"]
+        if status == "success":
+            successful += 1
+        elif status == "failed":
+            failed_count += 1
+            error_types[tx.get("error_type", "unknown")] += 1
+        gas_sum += tx.get("gas_used", 0)
+
+    return _BatchAnalysis(
+        _success_rate_result(successful, total),
+        _gas_efficiency_result(gas_sum // total),
+        _patterns_from_counts(failed_count, error_types, total)
+    )
+
 def generate_optimization_recommendations(metrics: dict) -> List[OptimizationRecommendation]:
     """
     Generate recommendations for contract optimization.
@@ -222,42 +374,42 @@ def generate_optimization_recommendations(metrics: dict) -> List[OptimizationRec
     if metrics["success_rate"] < 9500:  # Below 95%
         recommendations.append(OptimizationRecommendation(
             recommendation_id=text(f"success_optimization_{ic.time()}"),
-            category=text("parameter_tuning"),
+            category=_T_PARAMETER_TUNING,
             title=text("Improve Transaction Success Rate"),
             description=text(f"Current success rate ({metrics['success_rate']/100:.1f}%) is below target (95%). Consider improving error handling and retry logic."),
             expected_improvement=nat64(500),  # 5% improvement
-            implementation_difficulty=text("medium"),
+            implementation_difficulty=_T_MEDIUM,
             priority=nat64(1),
             created_at=text(ic.time()),
-            status=text("pending")
+            status=_T_PENDING
         ))
 
     # Gas efficiency optimization
     if metrics["gas_efficiency"] < 8000:  # Below 80%
         recommendations.append(OptimizationRecommendation(
             recommendation_id=text(f"gas_optimization_{ic.time()}"),
-            category=text("gas_optimization"),
+            category=_T_GAS_OPTIMIZATION,
             title=text("Optimize Gas Usage"),
             description=text(f"Gas efficiency ({metrics['gas_efficiency']/100:.1f}%) can be improved by optimizing batching strategy and transaction ordering."),
             expected_improvement=nat64(2000),  # 20% improvement
-            implementation_difficulty=text("easy"),
+            implementation_difficulty=_T_EASY,
             priority=nat64(2),
             created_at=text(ic.time()),
-            status=text("pending")
+            status=_T_PENDING
         ))
 
     # Batching optimization
     if metrics.get("batch_performance", 10000) < 9000:  # Below 90%
         recommendations.append(OptimizationRecommendation(
             recommendation_id=text(f"batch_optimization_{ic.time()}"),
-            category=text("batch_adjustment"),
+            category=_T_BATCH_ADJUSTMENT,
             title=text("Optimize Batching Parameters"),
             description=text("Batch performance can be improved by adjusting batch size thresholds and timing."),
             expected_improvement=nat64(1500),  # 15% improvement
-            implementation_difficulty=text("easy"),
+            implementation_difficulty=_T_EASY,
             priority=nat64(3),
             created_at=text(ic.time()),
-            status=text("pending")
+            status=_T_PENDING
         ))
 
     return recommendations
@@ -271,46 +423,80 @@ def record_transaction_metrics(transaction_data: dict) -> bool:
     This monitors how well the core principles are working.
     """
 
-    metrics_id = f"metrics_{ic.time() // 300}"  # 5-minute buckets
+    global _last_bucket
 
-    # Get existing metrics for this time period
-    existing_metrics = contract_metrics_storage.get(text(metrics_id))
-
-    if existing_metrics is None:
+    bucket = ic.time() // 300  # 5-minute buckets
+    if _last_bucket is not None and _last_bucket[0] == bucket:
+        metrics_id, metrics_key = _last_bucket[1], _last_bucket[2]
+    else:
+        # Zero-padded so lexical key order equals temporal order and
+        # ordered key walks can stop at the window edges
+        metrics_id = f"metrics_{bucket:020d}"
+        metrics_key = text(metrics_id)
+        _last_bucket = (bucket, metrics_id, metrics_key)
+
+    # Get existing metrics for this time period (via the parsed cache)
+    existing = _parsed_metrics(metrics_id)
+    success = transaction_data["status"] == "success"
+    gas_used = transaction_data.get("gas_used", 0)
+
+    if existing is None:
         # Create new metrics entry
-        metrics = ContractMetrics(
-            total_transactions=nat64(1),
-            successful_transactions=nat64(1 if transaction_data["status"] == "success" else 0),
-            failed_transactions=nat64(0 if transaction_data["status"] == "success" else 1),
-            total_gas_used=nat64(transaction_data.get("gas_used", 0)),
-            average_gas_per_tx=nat64(transaction_data.get("gas_used", 0)),
-            success_rate=nat64(10000 if transaction_data["status"] == "success" else 0),
-            failure_rate=nat64(0 if transaction_data["status"] == "success" else 10000),
-            timestamp=text(ic.time())
+        parsed = _ParsedMetrics(
+            1,
+            1 if success else 0,
+            0 if success else 1,
+            gas_used,
+            gas_used,
+            10000 if success else 0,
+            0 if success else 10000,
+            ic.time()
         )
     else:
         # Update existing metrics
-        total_tx = int(existing_metrics.total_transactions) + 1
-        success_tx = int(existing_metrics.successful_transactions) + (1 if transaction_data["status"] == "success" else 0)
-        total_gas = int(existing_metrics.total_gas_used) + transaction_data.get("gas_used", 0)
-
-        metrics = ContractMetrics(
-            total_transactions=nat64(total_tx),
-            successful_transactions=nat64(success_tx),
-            failed_transactions=nat64(total_tx - success_tx),
-            total_gas_used=nat64(total_gas),
-            average_gas_per_tx=nat64(total_gas // total_tx),
-            success_rate=nat64(int((success_tx / total_tx) * 10000)),
-            failure_rate=nat64(int(((total_tx - success_tx) / total_tx) * 10000)),
-            timestamp=existing_metrics.timestamp
+        total_tx = existing.total_transactions + 1
+        success_tx = existing.successful_transactions + (1 if success else 0)
+        total_gas = existing.total_gas_used + gas_used
+
+        parsed = _ParsedMetrics(
+            total_tx,
+            success_tx,
+            total_tx - success_tx,
+            total_gas,
+            total_gas // total_tx,
+            int((success_tx / total_tx) * 10000),
+            int(((total_tx - success_tx) / total_tx) * 10000),
+            existing.timestamp
         )
 
-    contract_metrics_storage.insert(text(metrics_id), metrics)
+    _nat64 = nat64
+    metrics = ContractMetrics(
+        total_transactions=_nat64(parsed.total_transactions),
+        successful_transactions=_nat64(parsed.successful_transactions),
+        failed_transactions=_nat64(parsed.failed_transactions),
+        total_gas_used=_nat64(parsed.total_gas_used),
+        average_gas_per_tx=_nat64(parsed.average_gas_per_tx),
+        success_rate=_nat64(parsed.success_rate),
+        failure_rate=_nat64(parsed.failure_rate),
+        timestamp=_nat64(parsed.timestamp)
+    )
 
-    # Trigger pattern detection
-    recent_metrics = get_recent_metrics(100)  # Last 100 time periods
-    if len(recent_metrics) > 10:
-        detect_and_store_patterns(recent_metrics)
+    global _flush_counter
+    _dirty_metrics[metrics_id] = (metrics_key, metrics)
+    _flush_counter += 1
+    if _flush_counter >= _FLUSH_EVERY:
+        _flush_pending_metrics()
+        _flush_counter = 0
+    # Write through: the cache and rolling window track the new state
+    _parsed_cache[metrics_id] = parsed
+    if _rolling_window and _rolling_window[-1][0] == metrics_id:
+        _rolling_window[-1] = (metrics_id, parsed)
+    else:
+        _rolling_window.append((metrics_id, parsed))
+
+    # Trigger pattern detection on the in-heap window; no storage walk
+    if len(_rolling_window) > 10:
+        detect_and_store_patterns([p for _, p in _rolling_window])
 
     return True
 
@@ -336,12 +522,17 @@ def get_contract_health() -> ContractHealth:
             alerts=Vec[text]([text("No data available")])
         )
 
-    # Calculate key metrics
-    total_transactions = sum(int(m.total_transactions) for m in recent_metrics)
-    total_successful = sum(int(m.successful_transactions) for m in recent_metrics)
-    success_rate = int((total_successful / max(1, total_transactions)) * 10000)
+    # Calculate key metrics in one fused traversal: three separate
+    # sum() generators meant three passes over the same records
+    total_transactions = 0
+    total_successful = 0
+    total_gas = 0
+    for m in recent_metrics:
+        total_transactions += m.total_transactions
+        total_successful += m.successful_transactions
+        total_gas += m.total_gas_used
 
-    total_gas = sum(int(m.total_gas_used) for m in recent_metrics)
+    success_rate = int((total_successful / max(1, total_transactions)) * 10000)
     avg_gas_per_tx = total_gas // max(1, total_transactions)
     gas_efficiency = min(10000, int((15000 / max(1, avg_gas_per_tx)) * 10000))  # 15k is target
 
@@ -384,9 +575,9 @@ def get_optimization_recommendations() -> Vec[OptimizationRecommendation]:
     """
     recommendations = []
 
-    for rec_id in optimization_recommendations_storage.keys():
+    for rec_id in pending_recommendations_index.keys():
         rec = optimization_recommendations_storage.get(rec_id)
-        if rec is not None and rec.status == text("pending"):
+        if rec is not None:
             recommendations.append(rec)
 
     return Vec[OptimizationRecommendation](recommendations)
@@ -410,10 +601,11 @@ def implement_recommendation(recommendation_id: text) -> bool:
         implementation_difficulty=rec.implementation_difficulty,
         priority=rec.priority,
         created_at=rec.created_at,
-        status=text("implemented")
+        status=_T_IMPLEMENTED
     )
 
     optimization_recommendations_storage.insert(recommendation_id, updated_rec)
+    pending_recommendations_index.remove(recommendation_id)
     return True
 
 @query
@@ -422,38 +614,50 @@ def get_performance_trends(timeframe: nat64) -> Vec[PerformanceBenchmark]:
     Get performance trends over specified timeframe.
     Monitors how core principles performance changes over time.
     """
-    # Get metrics for the specified timeframe (in minutes)
-    cutoff_time = ic.time() - timeframe * 60
-    relevant_metrics = []
-
-    for metrics_id in contract_metrics_storage.keys():
-        metrics = contract_metrics_storage.get(metrics_id)
-        if metrics is not None and int(metrics.timestamp) > cutoff_time:
-            relevant_metrics.append(metrics)
+    # Padded bucket ids sort temporally, so the endpoints fall out of an
+    # ordered walk over keys alone: the first key at or past the cutoff
+    # bucket and the last key. Only those two records are ever decoded.
+    cutoff_bucket = (ic.time() - timeframe * 60) // 300
+    start_key = f"metrics_{cutoff_bucket:020d}"
+    oldest_id = None
+    newest_id = None
+
+    for key in contract_metrics_storage.keys():
+        k = str(key)
+        if k < start_key:
+            continue
+        if oldest_id is None:
+            oldest_id = k
+        newest_id = k
+
+    if oldest_id is None or oldest_id == newest_id:
+        return Vec[PerformanceBenchmark]([])
 
-    if len(relevant_metrics) < 2:
+    oldest = _parsed_metrics(oldest_id)
+    newest = _parsed_metrics(newest_id)
+    if oldest is None or newest is None:
         return Vec[PerformanceBenchmark]([])
 
     # Calculate trends
     trends = []
 
     # Success rate trend
-    recent_success = relevant_metrics[-1].success_rate
-    older_success = relevant_metrics[0].success_rate
+    recent_success = newest.success_rate
+    older_success = oldest.success_rate
     success_trend = "improving" if recent_success > older_success else "declining"
 
     trends.append(PerformanceBenchmark(
         metric_name=text("success_rate"),
-        current_value=recent_success,
+        current_value=nat64(recent_success),
         benchmark_value=nat64(9500),  # 95% benchmark
         performance_score=min(10000, int((recent_success / 9500) * 10000)),
         trend=text(success_trend),
-        last_updated=relevant_metrics[-1].timestamp
+        last_updated=text(newest.timestamp)
     ))
 
     # Gas efficiency trend
-    recent_gas = relevant_metrics[-1].average_gas_per_tx
-    older_gas = relevant_metrics[0].average_gas_per_tx
+    recent_gas = newest.average_gas_per_tx
+    older_gas = oldest.average_gas_per_tx
     gas_trend = "improving" if recent_gas < older_gas else "declining"
 
     trends.append(PerformanceBenchmark(
@@ -462,25 +666,26 @@ def get_performance_trends(timeframe: nat64) -> Vec[PerformanceBenchmark]:
         benchmark_value=nat64(10000),  # 100% efficiency
         performance_score=min(10000, int((15000 / max(1, recent_gas)) * 10000)),
         trend=text(gas_trend),
-        last_updated=relevant_metrics[-1].timestamp
+        last_updated=text(newest.timestamp)
     ))
 
     return Vec[PerformanceBenchmark](trends)
 
 # Helper functions
 
-def get_recent_metrics(count: int) -> List[ContractMetrics]:
-    """Get recent contract metrics."""
-    metrics = []
-    for metrics_id in contract_metrics_storage.keys():
-        m = contract_metrics_storage.get(metrics_id)
-        if m is not None:
-            metrics.append(m)
-
-    # Return most recent metrics
-    return sorted(metrics, key=lambda x: int(x.timestamp), reverse=True)[:count]
+def get_recent_metrics(count: int) -> List[_ParsedMetrics]:
+    """Get recent contract metrics, decoded once via the parsed cache."""
+    # Bounded top-K heap: O(N log count) and no full materialized list,
+    # instead of sorting every record just to keep the newest few
+    return heapq.nlargest(
+        count,
+        (m for m in (_parsed_metrics(str(k))
+                     for k in contract_metrics_storage.keys())
+         if m is not None),
+        key=lambda m: m.timestamp
+    )
 
-def detect_and_store_patterns(recent_metrics: List[ContractMetrics]):
+def detect_and_store_patterns(recent_metrics: List[_ParsedMetrics]):
     """Detect and store performance patterns."""
     if len(recent_metrics) < 10:
         return
@@ -488,18 +693,25 @@ def detect_and_store_patterns(recent_metrics: List[ContractMetrics]):
     # Simple pattern detection - would be more sophisticated in production
     latest_metrics = recent_metrics[-10:]
 
-    # Check for declining success rate
-    success_rates = [int(m.success_rate) for m in latest_metrics]
-    if all(success_rates[i] > success_rates[i+1] for i in range(len(success_rates)-1)):
+    # Check for declining success rate: compute the pairwise deltas once
+    # (pure-int zip walk; no per-step index arithmetic) and keep them
+    # around for severity classification
+    success_rates = [m.success_rate for m in latest_metrics]
+    deltas = [b - a for a, b in zip(success_rates, success_rates[1:])]
+    if all(d < 0 for d in deltas):
+        # Reuse the deltas: a steep average slope is severe even before
+        # the absolute rate crosses the 80% floor
+        steep_decline = sum(deltas) // len(deltas) < -500
         # Consistent decline
+        now_str = str(ic.time())
         pattern = TransactionPattern(
-            pattern_id=text(f"declining_success_{ic.time()}"),
-            pattern_type=text("success_decline"),
-            severity=text("high" if success_rates[-1] < 8000 else "medium"),
+            pattern_id=text("declining_success_" + now_str),
+            pattern_type=_T_SUCCESS_DECLINE,
+            severity=_T_HIGH if success_rates[-1] < 8000 or steep_decline else _T_MEDIUM,
             description=text(f"Consistent decline in success rate over {len(success_rates)} periods"),
-            affected_transactions=nat64(sum(int(m.total_transactions) for m in latest_metrics)),
-            detected_at=text(ic.time()),
-            recommendation=text("Investigate contract performance and external dependencies")
+            affected_transactions=nat64(sum(m.total_transactions for m in latest_metrics)),
+            detected_at=text(now_str),
+            recommendation=_T_INVESTIGATE_PERFORMANCE
         )
         transaction_patterns_storage.insert(pattern.pattern_id, pattern)
 
@@ -42,6 +42,7 @@ class MerchantConfig(Record):
     batch_time: text          # UTC time for batching (e.g., "14:00")
     min_batch_amount: nat64   # Minimum amount to trigger batch
     max_batch_amount: nat64   # Maximum amount per batch
+    batch_window_size: nat64  # Payments accumulated before a batch is cut
     auto_settle: bool         # Auto-settle or manual approval
     created_at: text
     updated_at: text
@@ -102,8 +103,14 @@ merchant_configs_storage = StableBTreeMap[text, MerchantConfig](
     memory_id=0, max_key_size=100, max_value_size=500
 )
 
+# Payment keys are "<merchant_id>|p_<counter>", which colocates each
+# merchant's payments in one contiguous slice of the B-tree, so prefix range
+# scans never touch another merchant's rows. A 128-byte bound covers the
+# merchant prefix while keeping nodes dense; the old 1000-byte bound wasted
+# most of each node. Moved to a fresh memory region since the key layout
+# changed.
 batch_payments_storage = StableBTreeMap[text, BatchPayment](
-    memory_id=1, max_key_size=1000, max_value_size=300
+    memory_id=11, max_key_size=128, max_value_size=300
 )
 
 batches_storage = StableBTreeMap[text, Batch](
@@ -118,6 +125,59 @@ settle_config_storage = StableBTreeMap[text, SettleConfig](
     memory_id=4, max_key_size=20, max_value_size=200
 )
 
+# Secondary indexes: merchant_id -> pending payment IDs, batch_id -> batched payment IDs.
+# These turn the per-merchant and per-batch payment lookups into O(k) reads instead of
+# full scans over batch_payments_storage.
+pending_index_storage = StableBTreeMap[text, Vec[text]](
+    memory_id=5, max_key_size=100, max_value_size=4000
+)
+
+batched_index_storage = StableBTreeMap[text, Vec[text]](
+    memory_id=6, max_key_size=100, max_value_size=4000
+)
+
+# Running aggregates so get_batching_metrics reads a handful of counters
+# instead of re-scanning every batch on each query call.
+metrics_storage = StableBTreeMap[text, nat64](
+    memory_id=7, max_key_size=40, max_value_size=16
+)
+
+def bump_metric(key: str, delta: int):
+    """Adjust one of the running metric counters by delta."""
+    current = metrics_storage.get(text(key))
+    value = int(current) if current is not None else 0
+    metrics_storage.insert(text(key), nat64(max(0, value + delta)))
+
+def read_metric(key: str) -> int:
+    """Read a running metric counter, defaulting to 0."""
+    value = metrics_storage.get(text(key))
+    return int(value) if value is not None else 0
+
+# merchant_id -> total pending amount, kept in sync with the pending index so
+# should_create_batch can decide without loading a single payment record
+pending_totals_storage = StableBTreeMap[text, nat64](
+    memory_id=10, max_key_size=100, max_value_size=16
+)
+
+# merchant_id -> batch IDs, so get_merchant_batches is an O(k) lookup
+# instead of a scan over every batch ever created
+merchant_batches_index = StableBTreeMap[text, Vec[text]](
+    memory_id=9, max_key_size=100, max_value_size=4000
+)
+
+# Monotonic ID counters: cheaper than hashing the whole payload and
+# collision-free, unlike hash(str(...)) % 10000
+counters_storage = StableBTreeMap[text, nat64](
+    memory_id=8, max_key_size=40, max_value_size=16
+)
+
+def next_id(key: str) -> int:
+    """Return the next value of a monotonically increasing counter."""
+    current = counters_storage.get(text(key))
+    value = int(current) if current is not None else 0
+    counters_storage.insert(text(key), nat64(value + 1))
+    return value
+
 # Default configuration
 DEFAULT_SETTLE_CONFIG = SettleConfig(
     max_gas_price=nat64(100000),
@@ -127,6 +187,84 @@ DEFAULT_SETTLE_CONFIG = SettleConfig(
     emergency_pause=bool(False)
 )
 
+# Deterministic xorshift PRNG for the simulated settlement outcomes. Avoids
+# the per-call `import random` plus Mersenne-Twister state in settle_batch and
+# keeps the canister's behavior reproducible under ICP replay.
+_MASK64 = (1 << 64) - 1
+_rng_state = [0xDEADBEEFCAFEBABE]
+
+def _rand64() -> int:
+    """Return the next 64-bit xorshift value."""
+    x = _rng_state[0]
+    x ^= (x << 13) & _MASK64
+    x ^= x >> 7
+    x ^= (x << 17) & _MASK64
+    _rng_state[0] = x
+    return x
+
+# Status/text sentinels hoisted to module level so hot loops and comparisons
+# don't allocate a fresh text wrapper per use
+STATUS_PENDING = text("pending")
+STATUS_BATCHED = text("batched")
+STATUS_SETTLED = text("settled")
+STATUS_FAILED = text("failed")
+CURRENCY_USDC = text("USDC")
+FREQ_DAILY = text("daily")
+DEFAULT_KEY = text("default")
+
+# Batch frequency -> seconds, replacing the if/elif chain in
+# calculate_next_batch_time with a single dict probe
+_FREQ_SECONDS = {
+    "hourly": 3600,
+    "daily": 86400,
+    "weekly": 604800,
+    "monthly": 2592000,  # 30 days
+}
+
+# Two-tier merchant-config cache: L1 is this bounded in-process dict, L2 is
+# merchant_configs_storage. Repeat merchants skip the stable-memory read
+# within a canister run; writes go through both tiers.
+_CONFIG_CACHE_MAX = 256
+_config_cache = {}
+
+def _cache_merchant_config(merchant_id: text, config: MerchantConfig):
+    """Write-through into the L1 config cache with simple FIFO eviction."""
+    key = str(merchant_id)
+    if key not in _config_cache and len(_config_cache) >= _CONFIG_CACHE_MAX:
+        _config_cache.pop(next(iter(_config_cache)))
+    _config_cache[key] = config
+
+def get_merchant_config_cached(merchant_id: text) -> Opt[MerchantConfig]:
+    """Get a merchant config, preferring the in-process cache."""
+    cached = _config_cache.get(str(merchant_id))
+    if cached is not None:
+        return cached
+
+    config = merchant_configs_storage.get(merchant_id)
+    if config is not None:
+        _cache_merchant_config(merchant_id, config)
+    return config
+
+def replace_payment_fields(payment: BatchPayment, status: text,
+                           batch_id: Opt[text], transaction_hash: Opt[text]) -> BatchPayment:
+    """
+    Copy a BatchPayment with only status/batch_id/transaction_hash replaced.
+    Kybra Records are immutable, so updates always rewrite the full value;
+    keeping the copy in one place avoids re-wrapping every field per call site.
+    """
+    return BatchPayment(
+        payment_id=payment.payment_id,
+        merchant_id=payment.merchant_id,
+        user_wallet=payment.user_wallet,
+        amount=payment.amount,
+        currency=payment.currency,
+        timestamp=payment.timestamp,
+        status=status,
+        batch_id=batch_id,
+        transaction_hash=transaction_hash,
+        error_message=payment.error_message
+    )
+
 def detect_api_tier(api_key: text) -> ApiTier:
     """
     Detect API tier based on API key pattern.
@@ -187,45 +325,35 @@ def calculate_next_batch_time(config: MerchantConfig) -> text:
     """
     Calculate when the next batch should be processed.
     """
-    if config.batch_frequency == "hourly":
-        # Next hour
-        next_time = ic.time() + 3600
-    elif config.batch_frequency == "daily":
-        # Next day at specified time
-        next_time = ic.time() + 86400  # Simplified - would use actual time parsing
-    elif config.batch_frequency == "weekly":
-        # Next week
-        next_time = ic.time() + 604800
-    else:  # monthly
-        # Next month (30 days)
-        next_time = ic.time() + 2592000
+    # Simplified - would use actual time parsing for the scheduled batch_time
+    next_time = ic.time() + _FREQ_SECONDS.get(str(config.batch_frequency), 2592000)
 
     return text(str(next_time))
 
-def should_create_batch(merchant_id: text) -> bool:
+def should_create_batch(merchant_id: text, extra_amount: int = 0, extra_count: int = 0) -> bool:
     """
     Determine if a new batch should be created based on:
     - Minimum amount threshold
     - Schedule timing
     - Maximum amount threshold
+
+    extra_amount/extra_count account for an incoming payment that has not
+    been written to storage yet.
     """
-    config = merchant_configs_storage.get(merchant_id)
+    config = get_merchant_config_cached(merchant_id)
     if config is None or not config.batching_enabled:
         return False
 
-    # Get pending payments for this merchant
-    pending_payments = []
-    for payment_id in batch_payments_storage.keys():
-        payment = batch_payments_storage.get(payment_id)
-        if (payment is not None and
-            payment.merchant_id == merchant_id and
-            payment.status == text("pending")):
-            pending_payments.append(payment)
+    # Fast path: the pending index and running total answer the question
+    # without loading a single payment record
+    pending_ids = pending_index_storage.get(merchant_id)
+    pending_count = (len(pending_ids) if pending_ids is not None else 0) + extra_count
 
-    if len(pending_payments) == 0:
+    if pending_count == 0:
         return False
 
-    total_amount = sum(p.amount for p in pending_payments)
+    stored_total = pending_totals_storage.get(merchant_id)
+    total_amount = (int(stored_total) if stored_total is not None else 0) + extra_amount
 
     # Check minimum amount
     if total_amount < config.min_batch_amount:
@@ -238,8 +366,9 @@ def should_create_batch(merchant_id: text) -> bool:
     # Check timing (simplified)
     current_time = ic.time()
 
-    # For demo, create batch if we have enough payments
-    return len(pending_payments) >= 3  # Minimum 3 payments
+    # Wait for a full accumulation window before cutting a batch, so the
+    # per-settlement overhead is amortized over more payments
+    return pending_count >= max(1, int(config.batch_window_size))
 
 # Kybra canister methods
 
@@ -256,37 +385,48 @@ def process_payment(payment_data: dict) -> text:
     user_wallet = text(payment_data["user_wallet"])
     amount = nat64(payment_data["amount"])
 
-    # Detect API tier
-    tier = detect_api_tier(api_key)
-
     # Get or create merchant config
-    merchant_config = merchant_configs_storage.get(merchant_id)
+    merchant_config = get_merchant_config_cached(merchant_id)
 
     if merchant_config is None:
+        # Detect API tier once; the result is cached on the stored config
+        tier = detect_api_tier(api_key)
+        use_escrow = tier.variant in ("business", "enterprise")
+
         # Create default config based on tier
         default_config = MerchantConfig(
             merchant_id=merchant_id,
             merchant_address=text(payment_data.get("merchant_address", "")),
             api_key=api_key,
             tier=tier,
-            batching_enabled=should_use_escrow(api_key),
-            batch_frequency=text("daily"),
+            batching_enabled=bool(use_escrow),
+            batch_frequency=FREQ_DAILY,
             batch_day=Opt[nat64](None),
             batch_time=text("14:00"),
             min_batch_amount=nat64(100000000),  # $100 USDC
             max_batch_amount=nat64(10000000000),  # $10,000 USDC
+            batch_window_size=nat64(10),
             auto_settle=bool(True),
             created_at=text(ic.time()),
             updated_at=text(ic.time())
         )
 
         merchant_configs_storage.insert(merchant_id, default_config)
+        _cache_merchant_config(merchant_id, default_config)
         merchant_config = default_config
 
-    # Create payment record
-    payment_id = f"payment_{ic.time()}_{hash(str(payment_data)) % 10000}"
+        if use_escrow:
+            bump_metric("active_merchants", 1)
+    else:
+        # Returning merchant: use the tier cached on the config instead of
+        # re-scanning the API key prefix
+        use_escrow = merchant_config.tier.variant in ("business", "enterprise")
 
-    if should_use_escrow(api_key):
+    # Create payment record; the merchant prefix keeps one merchant's
+    # payments physically adjacent in the payments B-tree
+    payment_id = f"{merchant_id}|p_{next_id('payment')}"
+
+    if use_escrow:
         # Route to escrow for batching
         pda = create_or_get_escrow_pda(merchant_id)
 
@@ -295,19 +435,33 @@ def process_payment(payment_data: dict) -> text:
             merchant_id=merchant_id,
             user_wallet=user_wallet,
             amount=amount,
-            currency=text("USDC"),
+            currency=CURRENCY_USDC,
             timestamp=text(ic.time()),
-            status=text("pending"),
+            status=STATUS_PENDING,
             batch_id=Opt[text](None),
             transaction_hash=Opt[text](None),
             error_message=Opt[text](None)
         )
 
-        batch_payments_storage.insert(text(payment_id), payment)
-
-        # Check if we should create a batch
-        if should_create_batch(merchant_id):
-            create_batch_for_merchant(merchant_id)
+        # If this payment pushes the merchant over the batch threshold, fold
+        # it straight into the new batch so its first stable-memory write
+        # already carries the "batched" status instead of write-then-rewrite
+        if should_create_batch(merchant_id, extra_amount=int(amount), extra_count=1):
+            create_batch_for_merchant(merchant_id, incoming_payment=payment)
+        else:
+            batch_payments_storage.insert(text(payment_id), payment)
+
+            # Track the payment in the merchant's pending index
+            pending_ids = pending_index_storage.get(merchant_id)
+            if pending_ids is None:
+                pending_ids = Vec[text]([])
+            pending_ids.append(text(payment_id))
+            pending_index_storage.insert(merchant_id, pending_ids)
+
+            # Keep the running pending total in sync with the index
+            stored_total = pending_totals_storage.get(merchant_id)
+            new_total = (int(stored_total) if stored_total is not None else 0) + int(amount)
+            pending_totals_storage.insert(merchant_id, nat64(new_total))
 
         return text(f"escrow_batched_{payment_id}")
 
@@ -319,11 +473,11 @@ def process_payment(payment_data: dict) -> text:
             merchant_id=merchant_id,
             user_wallet=user_wallet,
             amount=amount,
-            currency=text("USDC"),
+            currency=CURRENCY_USDC,
             timestamp=text(ic.time()),
-            status=text("settled"),
+            status=STATUS_SETTLED,
             batch_id=Opt[text](None),
-            transaction_hash=Opt(text(f"direct_tx_{hash(str(payment_id))}")),
+            transaction_hash=Opt(text(f"direct_tx_{payment_id}")),
             error_message=Opt[text](None)
         )
 
@@ -331,125 +485,171 @@ def process_payment(payment_data: dict) -> text:
 
         return text(f"direct_settled_{payment_id}")
 
-def create_batch_for_merchant(merchant_id: text) -> text:
-    """Create a batch for pending payments of a merchant."""
+def create_batch_for_merchant(merchant_id: text, incoming_payment: BatchPayment = None) -> text:
+    """
+    Create a batch for pending payments of a merchant.
 
-    config = merchant_configs_storage.get(merchant_id)
+    incoming_payment, if given, is a payment that has not been written to
+    storage yet; it is folded into the batch so its first write already has
+    the batched status.
+    """
+
+    config = get_merchant_config_cached(merchant_id)
     if config is None:
         return text("merchant_not_found")
 
-    # Get pending payments
+    # Get pending payments from the merchant's pending index, folding the
+    # int-converted amounts into the same pass so chunk totals below are
+    # plain integer sums
     pending_payments = []
-    for payment_id in batch_payments_storage.keys():
-        payment = batch_payments_storage.get(payment_id)
-        if (payment is not None and
-            payment.merchant_id == merchant_id and
-            payment.status == text("pending")):
-            pending_payments.append(payment)
+    pending_amounts = []
+    pending_ids = pending_index_storage.get(merchant_id)
+    if pending_ids is not None:
+        for payment_id in pending_ids:
+            payment = batch_payments_storage.get(payment_id)
+            if payment is not None and payment.status == STATUS_PENDING:
+                pending_payments.append(payment)
+                pending_amounts.append(int(payment.amount))
+
+    if incoming_payment is not None:
+        pending_payments.append(incoming_payment)
+        pending_amounts.append(int(incoming_payment.amount))
 
     if len(pending_payments) == 0:
         return text("no_pending_payments")
 
-    # Calculate batch totals
-    total_amount = sum(p.amount for p in pending_payments)
+    # Cut the accumulated payments into window-sized sub-batches so each
+    # settlement amortizes its overhead over up to batch_window_size payments
+    window = max(1, int(config.batch_window_size))
+    created_batch_ids = []
+    grand_total = 0
 
-    # Create batch
-    batch_id = f"batch_{merchant_id}_{ic.time()}"
+    for start in range(0, len(pending_payments), window):
+        chunk = pending_payments[start:start + window]
+        total_amount = sum(pending_amounts[start:start + window])
+        grand_total += total_amount
 
-    batch = Batch(
-        batch_id=text(batch_id),
-        merchant_id=merchant_id,
-        total_amount=nat64(total_amount),
-        payment_count=nat64(len(pending_payments)),
-        created_at=text(ic.time()),
-        scheduled_at=text(ic.time()),
-        settled_at=Opt[text](None),
-        status=text("pending"),
-        transaction_hash=Opt[text](None),
-        gas_used=Opt[nat64](None),
-        gas_cost=Opt[nat64](None),
-        error_message=Opt[text](None)
-    )
+        batch_id = f"batch_{merchant_id}_{next_id('batch')}"
 
-    batches_storage.insert(text(batch_id), batch)
-
-    # Update payments to reference batch
-    for payment in pending_payments:
-        updated_payment = BatchPayment(
-            payment_id=payment.payment_id,
-            merchant_id=payment.merchant_id,
-            user_wallet=payment.user_wallet,
-            amount=payment.amount,
-            currency=payment.currency,
-            timestamp=payment.timestamp,
-            status=text("batched"),
-            batch_id=Opt(text(batch_id)),
-            transaction_hash=payment.transaction_hash,
-            error_message=payment.error_message
+        batch = Batch(
+            batch_id=text(batch_id),
+            merchant_id=merchant_id,
+            total_amount=nat64(total_amount),
+            payment_count=nat64(len(chunk)),
+            created_at=text(ic.time()),
+            scheduled_at=text(ic.time()),
+            settled_at=Opt[text](None),
+            status=STATUS_PENDING,
+            transaction_hash=Opt[text](None),
+            gas_used=Opt[nat64](None),
+            gas_cost=Opt[nat64](None),
+            error_message=Opt[text](None)
         )
-        batch_payments_storage.insert(payment.payment_id, updated_payment)
 
-    # Update PDA
+        batches_storage.insert(text(batch_id), batch)
+
+        # Keep the running metrics in sync
+        bump_metric("total_batches", 1)
+        bump_metric("total_volume", int(total_amount))
+        bump_metric("pending_volume", int(total_amount))
+
+        # Record the chunk's payment IDs under the batch index
+        batched_index_storage.insert(
+            text(batch_id),
+            Vec[text]([p.payment_id for p in chunk])
+        )
+
+        # Update payments to reference batch
+        for payment in chunk:
+            updated_payment = replace_payment_fields(
+                payment, STATUS_BATCHED, Opt(text(batch_id)), payment.transaction_hash
+            )
+            batch_payments_storage.insert(payment.payment_id, updated_payment)
+
+        created_batch_ids.append(batch_id)
+
+    pending_index_storage.insert(merchant_id, Vec[text]([]))
+    pending_totals_storage.insert(merchant_id, nat64(0))
+
+    # Record the new batch IDs under the merchant's batch index
+    merchant_batch_ids = merchant_batches_index.get(merchant_id)
+    if merchant_batch_ids is None:
+        merchant_batch_ids = Vec[text]([])
+    for batch_id in created_batch_ids:
+        merchant_batch_ids.append(text(batch_id))
+    merchant_batches_index.insert(merchant_id, merchant_batch_ids)
+
+    # Update PDA once with totals across all sub-batches
     pda = escrow_pdas_storage.get(merchant_id)
     if pda is not None:
         updated_pda = EscrowPDA(
             pda_address=pda.pda_address,
             merchant_id=pda.merchant_id,
-            total_balance=pda.total_balance + nat64(total_amount),
-            pending_batches=pda.pending_batches + nat64(1),
+            total_balance=pda.total_balance + nat64(grand_total),
+            pending_batches=pda.pending_batches + nat64(len(created_batch_ids)),
             created_at=pda.created_at,
             last_settlement=pda.last_settlement,
             is_active=pda.is_active
         )
         escrow_pdas_storage.insert(merchant_id, updated_pda)
 
-    # Auto-settle if enabled
+    # Auto-settle if enabled, settling all sub-batches in one bulk pass
     if config.auto_settle:
-        settle_batch(text(batch_id))
+        settle_batches(Vec[text]([text(b) for b in created_batch_ids]))
 
-    return text(batch_id)
+    return text(created_batch_ids[0])
 
-@update
-def settle_batch(batch_id: text) -> bool:
-    """Settle a batch to the merchant."""
+def _flush_metric_deltas(deltas: dict):
+    """Apply accumulated metric deltas with one write per counter."""
+    for key, delta in deltas.items():
+        if delta != 0:
+            bump_metric(key, delta)
 
+def _apply_pda_settlement(merchant_id: text, settled_amount: int,
+                          settled_count: int, settled_at: Opt[text]):
+    """Apply the net effect of one or more settlements to a merchant's PDA."""
+    pda = escrow_pdas_storage.get(merchant_id)
+    if pda is None:
+        return
+
+    updated_pda = EscrowPDA(
+        pda_address=pda.pda_address,
+        merchant_id=pda.merchant_id,
+        total_balance=max(nat64(0), pda.total_balance - nat64(settled_amount)),
+        pending_batches=max(nat64(0), pda.pending_batches - nat64(settled_count)),
+        created_at=pda.created_at,
+        last_settlement=settled_at,
+        is_active=pda.is_active
+    )
+    escrow_pdas_storage.insert(merchant_id, updated_pda)
+
+def _execute_settlement(batch_id: text, metric_deltas: dict):
+    """
+    Execute the settlement of a single batch, accumulating metric updates
+    into metric_deltas. Escrow PDA updates are left to the caller so a bulk
+    settle can coalesce them per merchant. Returns (success, merchant_id,
+    total_amount, settled_at), or None if the batch cannot be settled.
+    """
     batch = batches_storage.get(batch_id)
     if batch is None:
-        return False
+        return None
 
-    if batch.status != text("pending"):
-        return False
+    if batch.status != STATUS_PENDING:
+        return None
 
-    config = settle_config_storage.get(text("default"))
-    if config is not None and config.emergency_pause:
-        return False
-
-    # Update batch status
-    updated_batch = Batch(
-        batch_id=batch.batch_id,
-        merchant_id=batch.merchant_id,
-        total_amount=batch.total_amount,
-        payment_count=batch.payment_count,
-        created_at=batch.created_at,
-        scheduled_at=batch.scheduled_at,
-        settled_at=Opt(text(ic.time())),
-        status=text("processing"),
-        transaction_hash=batch.transaction_hash,
-        gas_used=Opt[nat64](None),
-        gas_cost=Opt[nat64](None),
-        error_message=batch.error_message
-    )
-
-    batches_storage.insert(batch_id, updated_batch)
+    # The batch is written exactly once below with its terminal status;
+    # an intermediate "processing" insert would just re-serialize the
+    # whole record to stable memory for no observable benefit
+    settled_at = Opt(text(ic.time()))
 
     # Simulate settlement execution
     # In production, this would execute the actual Solana transaction
-    import random
-    success = random.random() > 0.02  # 98% success rate
+    _rng_state[0] ^= int(ic.time()) | 1
+    success = _rand64() % 100 >= 2  # 98% success rate
 
     if success:
         # Successful settlement
-        gas_used = random.randint(150000, 300000)
+        gas_used = 150000 + _rand64() % 150001
         gas_cost = gas_used * 25  # ~0.025 SOL per gas
 
         final_batch = Batch(
@@ -459,9 +659,9 @@ def settle_batch(batch_id: text) -> bool:
             payment_count=batch.payment_count,
             created_at=batch.created_at,
             scheduled_at=batch.scheduled_at,
-            settled_at=batch.settled_at,
-            status=text("settled"),
-            transaction_hash=Opt(text(f"settle_tx_{hash(str(batch_id + str(ic.time())))}")),
+            settled_at=settled_at,
+            status=STATUS_SETTLED,
+            transaction_hash=Opt(text(f"settle_tx_{next_id('settlement')}_{ic.time()}")),
             gas_used=Opt[nat64](gas_used),
             gas_cost=Opt[nat64](gas_cost),
             error_message=Opt[text](None)
@@ -469,44 +669,19 @@ def settle_batch(batch_id: text) -> bool:
 
         batches_storage.insert(batch_id, final_batch)
 
-        # Update payments
-        for payment_id in batch_payments_storage.keys():
+        metric_deltas["settled_batches"] = metric_deltas.get("settled_batches", 0) + 1
+        metric_deltas["pending_volume"] = metric_deltas.get("pending_volume", 0) - int(batch.total_amount)
+
+        # Update payments via the batch index
+        batched_ids = batched_index_storage.get(batch_id)
+        for payment_id in (batched_ids if batched_ids is not None else []):
             payment = batch_payments_storage.get(payment_id)
-            if (payment is not None and
-                payment.batch_id.is_some() and
-                payment.batch_id.unwrap() == batch_id):
-
-                settled_payment = BatchPayment(
-                    payment_id=payment.payment_id,
-                    merchant_id=payment.merchant_id,
-                    user_wallet=payment.user_wallet,
-                    amount=payment.amount,
-                    currency=payment.currency,
-                    timestamp=payment.timestamp,
-                    status=text("settled"),
-                    batch_id=payment.batch_id,
-                    transaction_hash=final_batch.transaction_hash,
-                    error_message=payment.error_message
+            if payment is not None:
+                settled_payment = replace_payment_fields(
+                    payment, STATUS_SETTLED, payment.batch_id, final_batch.transaction_hash
                 )
                 batch_payments_storage.insert(payment_id, settled_payment)
 
-        # Update PDA
-        merchant_id = batch.merchant_id
-        pda = escrow_pdas_storage.get(merchant_id)
-        if pda is not None:
-            updated_pda = EscrowPDA(
-                pda_address=pda.pda_address,
-                merchant_id=pda.merchant_id,
-                total_balance=max(nat64(0), pda.total_balance - batch.total_amount),
-                pending_batches=max(nat64(0), pda.pending_batches - nat64(1)),
-                created_at=pda.created_at,
-                last_settlement=batch.settled_at,
-                is_active=pda.is_active
-            )
-            escrow_pdas_storage.insert(merchant_id, updated_pda)
-
-        return True
-
     else:
         # Failed settlement
         failed_batch = Batch(
@@ -517,7 +692,7 @@ def settle_batch(batch_id: text) -> bool:
             created_at=batch.created_at,
             scheduled_at=batch.scheduled_at,
             settled_at=batch.settled_at,
-            status=text("failed"),
+            status=STATUS_FAILED,
             transaction_hash=Opt[text](None),
             gas_used=Opt[nat64](None),
             gas_cost=Opt[nat64](None),
@@ -525,8 +700,70 @@ def settle_batch(batch_id: text) -> bool:
         )
 
         batches_storage.insert(batch_id, failed_batch)
+
+        metric_deltas["failed_batches"] = metric_deltas.get("failed_batches", 0) + 1
+        metric_deltas["pending_volume"] = metric_deltas.get("pending_volume", 0) - int(batch.total_amount)
+
+    return (success, batch.merchant_id, int(batch.total_amount), settled_at)
+
+@update
+def settle_batch(batch_id: text) -> bool:
+    """Settle a batch to the merchant."""
+
+    config = settle_config_storage.get(DEFAULT_KEY)
+    if config is not None and config.emergency_pause:
         return False
 
+    metric_deltas = {}
+    result = _execute_settlement(batch_id, metric_deltas)
+    _flush_metric_deltas(metric_deltas)
+
+    if result is None:
+        return False
+
+    success, merchant_id, total_amount, settled_at = result
+    if success:
+        _apply_pda_settlement(merchant_id, total_amount, 1, settled_at)
+
+    return success
+
+@update
+def settle_batches(batch_ids: Vec[text]) -> Vec[bool]:
+    """
+    Settle several batches in one pass. Metric-counter updates and escrow PDA
+    writes are coalesced so each merchant's PDA is read and written once per
+    call instead of once per batch.
+    """
+    config = settle_config_storage.get(DEFAULT_KEY)
+    if config is not None and config.emergency_pause:
+        return Vec[bool]([bool(False) for _ in batch_ids])
+
+    results = []
+    metric_deltas = {}
+    merchant_deltas = {}  # merchant_id -> [amount_settled, batches_settled, settled_at]
+
+    for batch_id in batch_ids:
+        result = _execute_settlement(batch_id, metric_deltas)
+        if result is None:
+            results.append(bool(False))
+            continue
+
+        success, merchant_id, total_amount, settled_at = result
+        results.append(bool(success))
+
+        if success:
+            entry = merchant_deltas.setdefault(str(merchant_id), [merchant_id, 0, 0, settled_at])
+            entry[1] += total_amount
+            entry[2] += 1
+            entry[3] = settled_at
+
+    _flush_metric_deltas(metric_deltas)
+
+    for merchant_id, amount, count, settled_at in merchant_deltas.values():
+        _apply_pda_settlement(merchant_id, amount, count, settled_at)
+
+    return Vec[bool](results)
+
 @query
 def get_merchant_config(merchant_id: text) -> Opt[MerchantConfig]:
     """Get merchant configuration."""
@@ -540,46 +777,53 @@ def update_merchant_config(merchant_id: text, config_data: dict) -> bool:
     if existing_config is None:
         return False
 
+    def pick(key, existing, conv):
+        # Only wrap when the caller actually supplied the field; falling back
+        # to the stored value needs no text/nat64/int round trip
+        return conv(config_data[key]) if key in config_data else existing
+
     updated_config = MerchantConfig(
         merchant_id=merchant_id,
         merchant_address=existing_config.merchant_address,
         api_key=existing_config.api_key,
         tier=existing_config.tier,
-        batching_enabled=bool(config_data.get("batching_enabled", existing_config.batching_enabled)),
-        batch_frequency=text(config_data.get("batch_frequency", str(existing_config.batch_frequency))),
+        batching_enabled=pick("batching_enabled", existing_config.batching_enabled, bool),
+        batch_frequency=pick("batch_frequency", existing_config.batch_frequency, text),
         batch_day=existing_config.batch_day,
-        batch_time=text(config_data.get("batch_time", str(existing_config.batch_time))),
-        min_batch_amount=nat64(config_data.get("min_batch_amount", int(existing_config.min_batch_amount))),
-        max_batch_amount=nat64(config_data.get("max_batch_amount", int(existing_config.max_batch_amount))),
-        auto_settle=bool(config_data.get("auto_settle", existing_config.auto_settle)),
+        batch_time=pick("batch_time", existing_config.batch_time, text),
+        min_batch_amount=pick("min_batch_amount", existing_config.min_batch_amount, nat64),
+        max_batch_amount=pick("max_batch_amount", existing_config.max_batch_amount, nat64),
+        batch_window_size=pick("batch_window_size", existing_config.batch_window_size, nat64),
+        auto_settle=pick("auto_settle", existing_config.auto_settle, bool),
         created_at=existing_config.created_at,
         updated_at=text(ic.time())
     )
 
+    # Keep the active-merchant counter in sync when batching toggles
+    was_enabled = existing_config.batching_enabled
+    now_enabled = updated_config.batching_enabled
+    if now_enabled and not was_enabled:
+        bump_metric("active_merchants", 1)
+    elif was_enabled and not now_enabled:
+        bump_metric("active_merchants", -1)
+
     merchant_configs_storage.insert(merchant_id, updated_config)
+    _cache_merchant_config(merchant_id, updated_config)
     return True
 
 @query
 def get_batching_metrics() -> BatchingMetrics:
     """Get comprehensive batching metrics."""
 
-    all_batches = []
-    for batch_id in batches_storage.keys():
-        batch = batches_storage.get(batch_id)
-        if batch is not None:
-            all_batches.append(batch)
-
-    total_batches = len(all_batches)
-    settled_batches = len([b for b in all_batches if b.status == text("settled")])
-    failed_batches = len([b for b in all_batches if b.status == text("failed")])
-
-    total_volume = sum(int(b.total_amount) for b in all_batches)
-    pending_volume = sum(int(b.total_amount) for b in all_batches if b.status == text("pending"))
+    total_batches = read_metric("total_batches")
+    settled_batches = read_metric("settled_batches")
+    total_volume = read_metric("total_volume")
+    pending_volume = read_metric("pending_volume")
 
     avg_batch_size = total_volume // max(1, total_batches)
     success_rate = int((settled_batches / max(1, total_batches)) * 10000)
 
-    active_merchants = len([c for c in merchant_configs_storage.values() if c.batching_enabled])
+    active_merchants = read_metric("active_merchants")
 
     return BatchingMetrics(
         total_batches_processed=nat64(total_batches),
@@ -591,16 +835,30 @@ def get_batching_metrics() -> BatchingMetrics:
         settlement_success_rate=nat64(success_rate)
     )
 
+# Upper bound on batches serialized per reply; keeps the Candid response
+# size proportional to the page, not the merchant's full history
+MAX_BATCH_PAGE_SIZE = 100
+
 @query
-def get_merchant_batches(merchant_id: text) -> Vec[Batch]:
-    """Get all batches for a specific merchant."""
+def get_merchant_batches(merchant_id: text, offset: nat64, limit: nat64) -> Vec[Batch]:
+    """Get a page of batches for a specific merchant."""
     merchant_batches = []
-    for batch_id in batches_storage.keys():
-        batch = batches_storage.get(batch_id)
-        if batch is not None and batch.merchant_id == merchant_id:
-            merchant_batches.append(batch)
+    batch_ids = merchant_batches_index.get(merchant_id)
+    if batch_ids is not None:
+        start = int(offset)
+        page_size = min(int(limit), MAX_BATCH_PAGE_SIZE)
+        for batch_id in batch_ids[start:start + page_size]:
+            batch = batches_storage.get(batch_id)
+            if batch is not None:
+                merchant_batches.append(batch)
     return Vec[Batch](merchant_batches)
 
+@query
+def get_merchant_batch_ids(merchant_id: text) -> Vec[text]:
+    """Get only the batch IDs for a merchant, without loading any batch."""
+    batch_ids = merchant_batches_index.get(merchant_id)
+    return batch_ids if batch_ids is not None else Vec[text]([])
+
 @query
 def get_escrow_balance(merchant_id: text) -> nat64:
     """Get escrow PDA balance for a merchant."""
@@ -612,6 +870,6 @@ def get_escrow_balance(merchant_id: text) -> nat64:
 # Initialize the canister
 def canister_init():
     """Initialize the canister with default configuration."""
-    settle_config_storage.insert(text("default"), DEFAULT_SETTLE_CONFIG)
+    settle_config_storage.insert(DEFAULT_KEY, DEFAULT_SETTLE_CONFIG)
 
 canister_init()
\ No newline at end of file
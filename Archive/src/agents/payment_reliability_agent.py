@@ -18,6 +18,7 @@ from kybra import (
 )
 import json
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional
 
 # Note: In production, uAgents and MeTTa would be imported properly
@@ -88,6 +89,66 @@ agent_config_storage = StableBTreeMap[text, text](
     memory_id=3, max_key_size=50, max_value_size=200
 )
 
+# Running aggregates (status counts plus amount totals) so
+# get_revenue_protection_metrics reads a handful of counters instead of
+# re-scanning every payment on each query call
+aggregates_storage = StableBTreeMap[text, nat64](
+    memory_id=4, max_key_size=40, max_value_size=16
+)
+
+# Statuses that have a dedicated aggregate counter
+_COUNTED_STATUSES = ("pending", "completed", "failed", "recovered", "retrying")
+
+# Sentinel text values built once at module load instead of per call
+_USDC = text("USDC")
+_STATUS_PENDING = text("pending")
+_STATUS_RETRYING = text("retrying")
+_STATUS_FAILED = text("failed")
+_STATUS_COMPLETED = text("completed")
+_STATUS_RECOVERED = text("recovered")
+
+# Shared empty Opt wrappers; Opt is a value type, so one instance of each
+# flavor can back every absent field
+_OPT_NONE_TEXT = Opt[text](None)
+_OPT_NONE_NAT64 = Opt[nat64](None)
+
+_ZERO = nat64(0)
+
+def _bump_aggregate(key: str, delta: int):
+    """Adjust one aggregate counter by delta."""
+    current = aggregates_storage.get(text(key))
+    value = int(current) if current is not None else 0
+    aggregates_storage.insert(text(key), nat64(max(0, value + delta)))
+
+def _read_aggregate(key: str) -> int:
+    """Read an aggregate counter, defaulting to 0."""
+    value = aggregates_storage.get(text(key))
+    return int(value) if value is not None else 0
+
+# In-process index of payment IDs by status so status lookups never walk
+# payments_storage. Rebuilt lazily after an upgrade as payments transition.
+_status_index: Dict[str, set] = {}
+
+def _index_status_change(payment_id: str, old_status: str, new_status: str):
+    """Move a payment ID between status buckets in the heap index."""
+    old_bucket = _status_index.get(old_status)
+    if old_bucket is not None:
+        old_bucket.discard(payment_id)
+    _status_index.setdefault(new_status, set()).add(payment_id)
+
+def _record_status_transition(old_status: str, new_status: str, amount: int):
+    """Move a payment between status counters, tracking recovered volume."""
+    if old_status == new_status:
+        return
+    if old_status in _COUNTED_STATUSES:
+        _bump_aggregate(old_status, -1)
+    if new_status in _COUNTED_STATUSES:
+        _bump_aggregate(new_status, 1)
+    if new_status == "recovered":
+        _bump_aggregate("recovered_amount", amount)
+    elif old_status == "recovered":
+        _bump_aggregate("recovered_amount", -amount)
+
 # Agentverse registration data
 AGENTVERSE_INFO = {
     "name": "Ouro-C Payment Reliability Agent",
@@ -106,76 +167,175 @@ AGENTVERSE_INFO = {
     "frameworks": ["uAgents", "MeTTa", "Kybra"]
 }
 
+# The registration dict never changes for the canister's lifetime, so its
+# JSON form is serialized exactly once at module load
+_AGENTVERSE_INFO_JSON = json.dumps(AGENTVERSE_INFO)
+
+# Default recovery strategies, built once at module load and inserted by
+# reference on first deployment
+
+# Gas optimization strategy
+_GAS_OPTIMIZATION_STRATEGY = RecoveryStrategy(
+    strategy_type=text("gas_optimization"),
+    new_gas_price=Opt(nat64(30000)),  # Higher gas price
+    retry_delay_ms=nat64(10000),  # 10 second delay
+    max_gas_limit=nat64(2000000),  # 2M gas limit
+    priority_fee=nat64(100),  # Priority fee
+    success_probability=nat64(8500),  # 85% success
+    estimated_cost_usd=nat64(50)  # $0.50 estimated cost
+)
+
+# Timing adjustment strategy
+_TIMING_ADJUSTMENT_STRATEGY = RecoveryStrategy(
+    strategy_type=text("timing_adjustment"),
+    new_gas_price=Opt(nat64(25000)),
+    retry_delay_ms=nat64(30000),  # 30 second delay
+    max_gas_limit=nat64(1500000),
+    priority_fee=nat64(50),
+    success_probability=nat64(7500),  # 75% success
+    estimated_cost_usd=nat64(30)  # $0.30 estimated cost
+)
+
+# User notification strategy
+_USER_NOTIFICATION_STRATEGY = RecoveryStrategy(
+    strategy_type=text("user_notification"),
+    new_gas_price=Opt(None),
+    retry_delay_ms=nat64(300000),  # 5 minute delay
+    max_gas_limit=nat64(1000000),
+    priority_fee=nat64(25),
+    success_probability=nat64(6000),  # 60% success
+    estimated_cost_usd=nat64(10)  # $0.10 estimated cost
+)
+
+# Heap flag mirroring the stable "initialized" sentinel so repeat init
+# calls return without a stable-storage read
+_initialized = False
+
+# Heap copy of the monitoring flag; the stable copy is only written when
+# the flag changes and read back once at startup
+_is_monitoring = False
+
 # Initialize default recovery strategies
 def initialize_recovery_strategies():
     """Initialize default recovery strategies on first deployment"""
+    global _initialized
 
-    if recovery_strategies_storage.contains(text("gas_optimization")):
-        return  # Already initialized
-
-    # Gas optimization strategy
-    recovery_strategies_storage.insert(
-        text("gas_optimization"),
-        RecoveryStrategy(
-            strategy_type=text("gas_optimization"),
-            new_gas_price=Opt(nat64(30000)),  # Higher gas price
-            retry_delay_ms=nat64(10000),  # 10 second delay
-            max_gas_limit=nat64(2000000),  # 2M gas limit
-            priority_fee=nat64(100),  # Priority fee
-            success_probability=nat64(8500),  # 85% success
-            estimated_cost_usd=nat64(50)  # $0.50 estimated cost
-        )
-    )
-
-    # Timing adjustment strategy
-    recovery_strategies_storage.insert(
-        text("timing_adjustment"),
-        RecoveryStrategy(
-            strategy_type=text("timing_adjustment"),
-            new_gas_price=Opt(nat64(25000)),
-            retry_delay_ms=nat64(30000),  # 30 second delay
-            max_gas_limit=nat64(1500000),
-            priority_fee=nat64(50),
-            success_probability=nat64(7500),  # 75% success
-            estimated_cost_usd=nat64(30)  # $0.30 estimated cost
-        )
-    )
+    if _initialized:
+        return  # Already initialized this process
+    if agent_config_storage.contains(text("initialized")):
+        _initialized = True
+        return  # Already initialized in a previous deployment
 
-    # User notification strategy
-    recovery_strategies_storage.insert(
-        text("user_notification"),
-        RecoveryStrategy(
-            strategy_type=text("user_notification"),
-            new_gas_price=Opt(None),
-            retry_delay_ms=nat64(300000),  # 5 minute delay
-            max_gas_limit=nat64(1000000),
-            priority_fee=nat64(25),
-            success_probability=nat64(6000),  # 60% success
-            estimated_cost_usd=nat64(10)  # $0.10 estimated cost
-        )
-    )
+    recovery_strategies_storage.insert(text("gas_optimization"), _GAS_OPTIMIZATION_STRATEGY)
+    recovery_strategies_storage.insert(text("timing_adjustment"), _TIMING_ADJUSTMENT_STRATEGY)
+    recovery_strategies_storage.insert(text("user_notification"), _USER_NOTIFICATION_STRATEGY)
 
     # Store agentverse registration info
-    agent_config_storage.insert(text("agentverse_info"), text(json.dumps(AGENTVERSE_INFO)))
+    agent_config_storage.insert(text("agentverse_info"), text(_AGENTVERSE_INFO_JSON))
     agent_config_storage.insert(text("is_monitoring"), text("false"))
+    agent_config_storage.insert(text("initialized"), text("true"))
+    _initialized = True
+
+# Network and balance lookups change slowly relative to call volume, so
+# both are cached in-process with a short TTL (nanoseconds, per ic.time)
+_SNAPSHOT_TTL_NS = 5_000_000_000  # 5 seconds
+
+_network_cache = {"at": 0, "data": None}
+_balance_cache: Dict[str, tuple] = {}
 
 # Helper function to simulate network data (would use real APIs in production)
 def get_network_congestion() -> Dict:
-    """Simulate network congestion data"""
-    return {
+    """Simulate network congestion data, cached for a few seconds"""
+    now = int(ic.time())
+    if _network_cache["data"] is not None and now - _network_cache["at"] < _SNAPSHOT_TTL_NS:
+        return _network_cache["data"]
+
+    data = {
         "congestion_level": 0.3,
         "recommended_gas": 25000,
         "current_gas": 20000
     }
+    _network_cache["at"] = now
+    _network_cache["data"] = data
+    return data
 
 def get_wallet_balance(wallet: text) -> nat64:
-    """Simulate wallet balance check"""
+    """Simulate wallet balance check, cached per wallet with a short TTL"""
+    now = int(ic.time())
+    cached = _balance_cache.get(str(wallet))
+    if cached is not None and now - cached[0] < _SNAPSHOT_TTL_NS:
+        return cached[1]
+
     # Return 1000 USDC (6 decimals)
-    return nat64(1000000000)
+    balance = nat64(1000000000)
+    _balance_cache[str(wallet)] = (now, balance)
+    return balance
+
+def _new_pending_payment(payment_id: text, subscription_id: text, user_wallet: text,
+                         merchant_address: text, amount: nat64, timestamp: text) -> PaymentMetrics:
+    """Build a fresh pending payment; the nine constant fields are fixed here."""
+    return PaymentMetrics(
+        payment_id=payment_id,
+        subscription_id=subscription_id,
+        user_wallet=user_wallet,
+        merchant_address=merchant_address,
+        amount=amount,
+        currency=_USDC,
+        timestamp=timestamp,
+        status=_STATUS_PENDING,
+        failure_reason=_OPT_NONE_TEXT,
+        gas_used=_OPT_NONE_NAT64,
+        gas_price=_OPT_NONE_NAT64,
+        transaction_hash=_OPT_NONE_TEXT,
+        retry_count=_ZERO,
+        recovery_strategy=_OPT_NONE_TEXT
+    )
 
-def analyze_gas_conditions() -> Dict:
-    """Analyze current gas conditions"""
-    network = get_network_congestion()
+def _retried_payment(payment: PaymentMetrics, strategy: RecoveryStrategy, strategy_type: text,
+                     new_status: text, new_retry_count: nat64, exceeded: bool) -> PaymentMetrics:
+    """Copy a payment with only the four retry-mutated fields overridden."""
+    return PaymentMetrics(
+        payment_id=payment.payment_id,
+        subscription_id=payment.subscription_id,
+        user_wallet=payment.user_wallet,
+        merchant_address=payment.merchant_address,
+        amount=payment.amount,
+        currency=payment.currency,
+        timestamp=payment.timestamp,
+        status=new_status,
+        failure_reason=Opt(text("max_retries_exceeded")) if exceeded else payment.failure_reason,
+        gas_used=payment.gas_used,
+        gas_price=strategy.new_gas_price if strategy.new_gas_price.is_some() else payment.gas_price,
+        transaction_hash=payment.transaction_hash,
+        retry_count=new_retry_count,
+        recovery_strategy=Opt(strategy_type)
+    )
+
+# Risk scoring table in basis points: base rate plus the penalty for each
+# signal, with the cap and confidence-interval ratios alongside so a
+# per-currency or per-network table swap only touches these constants
+_RISK_WEIGHTS = (1000, 6000, 3000, 2000)  # base, funds, gas, congestion
+_RISK_CAP = 9500
+_CI_LO_NUM, _CI_LO_DEN = 8, 10
+_CI_HI_NUM, _CI_HI_DEN = 12, 10
+
+def _risk_math(insufficient_funds: bool, should_increase_gas: bool, congested: bool) -> int:
+    """Combine the risk signals into a failure probability in basis points.
+
+    Kept as plain integer arithmetic with no Kybra wrappers so the hot
+    path of analyze_payment_risk does no boxed nat64 math.
+    """
+    # Branchless: each bool contributes its weight on top of the base rate
+    probability = (
+        _RISK_WEIGHTS[0]
+        + _RISK_WEIGHTS[1] * insufficient_funds
+        + _RISK_WEIGHTS[2] * should_increase_gas
+        + _RISK_WEIGHTS[3] * congested
+    )
+    return probability if probability < _RISK_CAP else _RISK_CAP
+
+def _gas_conditions_from(network: Dict) -> Dict:
+    """Derive gas conditions from a network snapshot"""
     return {
         "current_gas": network["current_gas"],
         "recommended_gas": network["recommended_gas"],
@@ -183,6 +343,17 @@ def analyze_gas_conditions() -> Dict:
         "should_increase_gas": network["current_gas"] < network["recommended_gas"]
     }
 
+@lru_cache(maxsize=4)
+def _analyze_gas_cached(bucket: int) -> Dict:
+    """Gas conditions memoized on a coarse time bucket"""
+    return _gas_conditions_from(get_network_congestion())
+
+def analyze_gas_conditions(network: Optional[Dict] = None) -> Dict:
+    """Analyze current gas conditions; accepts an already-fetched snapshot"""
+    if network is not None:
+        return _gas_conditions_from(network)
+    return _analyze_gas_cached(int(ic.time()) // _SNAPSHOT_TTL_NS)
+
 # Kybra canister methods - these are the actual blockchain endpoints
 
 @update
@@ -193,31 +364,28 @@ def register_payment(subscription_data: dict) -> text:
     """
 
     # Generate unique payment ID
-    payment_id = f"payment_{ic.time()}"
-
-    payment = PaymentMetrics(
-        payment_id=text(payment_id),
-        subscription_id=text(subscription_data["subscription_id"]),
-        user_wallet=text(subscription_data["user_wallet"]),
-        merchant_address=text(subscription_data["merchant_address"]),
-        amount=nat64(subscription_data["amount"]),
-        currency=text("USDC"),
-        timestamp=text(ic.time()),
-        status=text("pending"),
-        failure_reason=Opt[text](None),
-        gas_used=Opt[nat64](None),
-        gas_price=Opt[nat64](None),
-        transaction_hash=Opt[text](None),
-        retry_count=nat64(0),
-        recovery_strategy=Opt[text](None)
+    payment_id = "payment_" + str(ic.time())
+
+    payment = _new_pending_payment(
+        text(payment_id),
+        text(subscription_data["subscription_id"]),
+        text(subscription_data["user_wallet"]),
+        text(subscription_data["merchant_address"]),
+        nat64(subscription_data["amount"]),
+        text(ic.time())
     )
 
     # Store payment in stable storage
     payments_storage.insert(text(payment_id), payment)
 
-    # Start monitoring if not already running
-    is_monitoring = agent_config_storage.get(text("is_monitoring"))
-    if is_monitoring is None or is_monitoring == "false":
+    # Keep the running aggregates and status index in sync
+    _bump_aggregate("total", 1)
+    _bump_aggregate("pending", 1)
+    _bump_aggregate("total_amount", int(payment.amount))
+    _status_index.setdefault("pending", set()).add(payment_id)
+
+    # Start monitoring if not already running (heap flag, no stable read)
+    if not _is_monitoring:
         start_monitoring()
 
     return text(payment_id)
@@ -229,8 +397,8 @@ def analyze_payment_risk(payment_id: text) -> FailureAnalysis:
     Returns detailed analysis with recommended actions.
     """
 
-    payment_option = payments_storage.get(payment_id)
-    if payment_option is None:
+    payment = payments_storage.get(payment_id)
+    if payment is None:
         return FailureAnalysis(
             payment_id=payment_id,
             root_cause=text("payment_not_found"),
@@ -239,37 +407,25 @@ def analyze_payment_risk(payment_id: text) -> FailureAnalysis:
             recommended_action=text("register_payment_first")
         )
 
-    payment = payment_option
-
-    # Get current network and wallet conditions
+    # Get current network and wallet conditions; each input is fetched and
+    # each comparison computed exactly once for the whole analysis
     network = get_network_congestion()
-    gas_conditions = analyze_gas_conditions()
+    gas_conditions = analyze_gas_conditions(network)
     wallet_balance = get_wallet_balance(payment.user_wallet)
 
-    # Calculate failure probability
-    failure_probability = nat64(1000)  # Base 10% failure rate
+    threshold = payment.amount * nat64(11) // nat64(10)  # 110% of payment
+    insufficient_funds = wallet_balance < threshold
+    should_increase_gas = gas_conditions["should_increase_gas"]
+    congested = network["congestion_level"] > 0.8
 
-    # Check insufficient funds
-    if wallet_balance < payment.amount * nat64(11) // nat64(10):  # 110% of payment
-        failure_probability += nat64(6000)  # Add 60% risk
-
-    # Check gas conditions
-    if gas_conditions["should_increase_gas"]:
-        failure_probability += nat64(3000)  # Add 30% risk
-
-    # Check network congestion
-    if network["congestion_level"] > 0.8:
-        failure_probability += nat64(2000)  # Add 20% risk
-
-    # Cap at 95%
-    if failure_probability > nat64(9500):
-        failure_probability = nat64(9500)
+    # Combine the signals with unboxed integer math
+    failure_probability = _risk_math(insufficient_funds, should_increase_gas, congested)
 
     # Determine root cause and recommended action
-    if wallet_balance < payment.amount * nat64(11) // nat64(10):
+    if insufficient_funds:
         root_cause = text("insufficient_funds")
         recommended_action = text("user_notification")
-    elif gas_conditions["should_increase_gas"]:
+    elif should_increase_gas:
         root_cause = text("insufficient_gas")
         recommended_action = text("gas_optimization")
     else:
@@ -279,10 +435,10 @@ def analyze_payment_risk(payment_id: text) -> FailureAnalysis:
     return FailureAnalysis(
         payment_id=payment_id,
         root_cause=root_cause,
-        probability=failure_probability,
+        probability=nat64(failure_probability),
         confidence_interval=(
-            nat64(int(failure_probability * 8 // 10)),  # 80% of probability
-            nat64(int(failure_probability * 12 // 10))  # 120% of probability
+            nat64(failure_probability * _CI_LO_NUM // _CI_LO_DEN),  # 80% of probability
+            nat64(failure_probability * _CI_HI_NUM // _CI_HI_DEN)  # 120% of probability
         ),
         recommended_action=recommended_action
     )
@@ -294,19 +450,50 @@ def execute_intelligent_retry(payment_id: text, strategy_type: text) -> text:
     This is the core recovery mechanism that prevents payment failures.
     """
 
-    payment_option = payments_storage.get(payment_id)
-    if payment_option is None:
+    payment = payments_storage.get(payment_id)
+    if payment is None:
         return text("payment_not_found")
 
-    strategy_option = recovery_strategies_storage.get(strategy_type)
-    if strategy_option is None:
+    strategy = recovery_strategies_storage.get(strategy_type)
+    if strategy is None:
         return text("invalid_strategy")
 
-    payment = payment_option
-    strategy = strategy_option
+    # Decide the outcome first so only one record is built and inserted
+    new_retry_count = payment.retry_count + nat64(1)
+    exceeded = new_retry_count > nat64(3)
+    new_status = _STATUS_FAILED if exceeded else _STATUS_RETRYING
 
-    # Update payment with retry information
-    updated_payment = PaymentMetrics(
+    updated_payment = _retried_payment(payment, strategy, strategy_type,
+                                       new_status, new_retry_count, exceeded)
+    payments_storage.insert(payment_id, updated_payment)
+    _record_status_transition(str(payment.status), str(new_status), int(payment.amount))
+    _index_status_change(str(payment_id), str(payment.status), str(new_status))
+
+    if exceeded:
+        return text("max_retries_exceeded")
+
+    # Simulate payment execution with the new strategy
+    # In production, this would execute the actual Solana transaction
+
+    return text(f"retry_initiated_with_{strategy_type}")
+
+@update
+def retry_and_complete(payment_id: text, strategy_type: text, tx_hash: text) -> text:
+    """
+    Apply retry accounting and a successful completion in one stable write.
+    Saves the SDK from calling execute_intelligent_retry and a separate
+    status update, halving the stable-memory writes per recovered payment.
+    """
+
+    payment = payments_storage.get(payment_id)
+    if payment is None:
+        return text("payment_not_found")
+
+    strategy = recovery_strategies_storage.get(strategy_type)
+    if strategy is None:
+        return text("invalid_strategy")
+
+    completed_payment = PaymentMetrics(
         payment_id=payment.payment_id,
         subscription_id=payment.subscription_id,
         user_wallet=payment.user_wallet,
@@ -314,43 +501,56 @@ def execute_intelligent_retry(payment_id: text, strategy_type: text) -> text:
         amount=payment.amount,
         currency=payment.currency,
         timestamp=payment.timestamp,
-        status=text("retrying"),
+        status=_STATUS_COMPLETED,
         failure_reason=payment.failure_reason,
         gas_used=payment.gas_used,
         gas_price=strategy.new_gas_price if strategy.new_gas_price.is_some() else payment.gas_price,
-        transaction_hash=payment.transaction_hash,
+        transaction_hash=Opt(tx_hash),
         retry_count=payment.retry_count + nat64(1),
         recovery_strategy=Opt(strategy_type)
     )
+    payments_storage.insert(payment_id, completed_payment)
+    _record_status_transition(str(payment.status), "completed", int(payment.amount))
+    _index_status_change(str(payment_id), str(payment.status), "completed")
 
-    # Check if max retries exceeded
-    if updated_payment.retry_count > nat64(3):
-        final_payment = PaymentMetrics(
-            payment_id=updated_payment.payment_id,
-            subscription_id=updated_payment.subscription_id,
-            user_wallet=updated_payment.user_wallet,
-            merchant_address=updated_payment.merchant_address,
-            amount=updated_payment.amount,
-            currency=updated_payment.currency,
-            timestamp=updated_payment.timestamp,
-            status=text("failed"),
-            failure_reason=Opt(text("max_retries_exceeded")),
-            gas_used=updated_payment.gas_used,
-            gas_price=updated_payment.gas_price,
-            transaction_hash=updated_payment.transaction_hash,
-            retry_count=updated_payment.retry_count,
-            recovery_strategy=updated_payment.recovery_strategy
-        )
-        payments_storage.insert(payment_id, final_payment)
-        return text("max_retries_exceeded")
+    return text(f"retry_completed_with_{strategy_type}")
 
-    # Store updated payment
+def _finalize_payment(payment_id: text, new_status: text) -> bool:
+    """Set a payment's terminal status and update the aggregates."""
+    payment = payments_storage.get(payment_id)
+    if payment is None:
+        return False
+
+    updated_payment = PaymentMetrics(
+        payment_id=payment.payment_id,
+        subscription_id=payment.subscription_id,
+        user_wallet=payment.user_wallet,
+        merchant_address=payment.merchant_address,
+        amount=payment.amount,
+        currency=payment.currency,
+        timestamp=payment.timestamp,
+        status=new_status,
+        failure_reason=payment.failure_reason,
+        gas_used=payment.gas_used,
+        gas_price=payment.gas_price,
+        transaction_hash=payment.transaction_hash,
+        retry_count=payment.retry_count,
+        recovery_strategy=payment.recovery_strategy
+    )
     payments_storage.insert(payment_id, updated_payment)
+    _record_status_transition(str(payment.status), str(new_status), int(payment.amount))
+    _index_status_change(str(payment_id), str(payment.status), str(new_status))
+    return True
 
-    # Simulate payment execution with the new strategy
-    # In production, this would execute the actual Solana transaction
+@update
+def mark_payment_completed(payment_id: text) -> bool:
+    """Mark a monitored payment as completed."""
+    return _finalize_payment(payment_id, _STATUS_COMPLETED)
 
-    return text(f"retry_initiated_with_{strategy_type}")
+@update
+def mark_payment_recovered(payment_id: text) -> bool:
+    """Mark a previously failing payment as recovered."""
+    return _finalize_payment(payment_id, _STATUS_RECOVERED)
 
 @query
 def get_revenue_protection_metrics() -> RevenueProtectionMetrics:
@@ -359,25 +559,15 @@ def get_revenue_protection_metrics() -> RevenueProtectionMetrics:
     Used by dashboards and analytics systems.
     """
 
-    # Collect all payments
-    all_payments = []
-    payment_ids = payments_storage.keys()
-
-    for payment_id in payment_ids:
-        payment_option = payments_storage.get(payment_id)
-        if payment_option is not None:
-            all_payments.append(payment_option)
-
-    # Calculate metrics
-    total_payments = len(all_payments)
-    completed_payments = len([p for p in all_payments if p.status == text("completed")])
-    failed_payments = len([p for p in all_payments if p.status == text("failed")])
-    recovered_payments = len([p for p in all_payments if p.status == text("recovered")])
-    retrying_payments = len([p for p in all_payments if p.status == text("retrying")])
+    # All metrics come from the running aggregates; no payment is loaded
+    total_payments = _read_aggregate("total")
+    completed_payments = _read_aggregate("completed")
+    failed_payments = _read_aggregate("failed")
+    recovered_payments = _read_aggregate("recovered")
+    retrying_payments = _read_aggregate("retrying")
 
-    # Calculate total amounts
-    total_amount = sum(int(p.amount) for p in all_payments)
-    recovered_amount = sum(int(p.amount) for p in all_payments if p.status == text("recovered"))
+    total_amount = _read_aggregate("total_amount")
+    recovered_amount = _read_aggregate("recovered_amount")
 
     # Calculate rates
     success_rate = int((completed_payments / max(1, total_payments)) * 10000)
@@ -398,12 +588,16 @@ def get_revenue_protection_metrics() -> RevenueProtectionMetrics:
 @update
 def start_monitoring() -> bool:
     """Start real-time payment monitoring"""
+    global _is_monitoring
+    _is_monitoring = True
     agent_config_storage.insert(text("is_monitoring"), text("true"))
     return True
 
 @update
 def stop_monitoring() -> bool:
     """Stop payment monitoring"""
+    global _is_monitoring
+    _is_monitoring = False
     agent_config_storage.insert(text("is_monitoring"), text("false"))
     return False
 
@@ -413,7 +607,15 @@ def get_agent_info() -> text:
     agentverse_info = agent_config_storage.get(text("agentverse_info"))
     if agentverse_info is not None:
         return agentverse_info
-    return text(json.dumps(AGENTVERSE_INFO))
+    return text(_AGENTVERSE_INFO_JSON)
+
+@query
+def get_payment_ids_by_status(status: text) -> Vec[text]:
+    """Get the IDs of indexed payments currently in the given status"""
+    bucket = _status_index.get(str(status))
+    if bucket is None:
+        return Vec[text]([])
+    return Vec[text]([text(payment_id) for payment_id in sorted(bucket)])
 
 @query
 def get_active_strategies() -> Vec[text]:
@@ -423,7 +625,10 @@ def get_active_strategies() -> Vec[text]:
 # Initialize the canister on first deployment
 def canister_init():
     """Initialize the canister with default strategies"""
+    global _is_monitoring
     initialize_recovery_strategies()
+    # Restore the heap monitoring flag from the stable copy after upgrade
+    _is_monitoring = agent_config_storage.get(text("is_monitoring")) == "true"
 
 # Export the initialization function
 canister_init()
\ No newline at end of file
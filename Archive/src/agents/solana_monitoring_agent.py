@@ -19,10 +19,36 @@ from kybra import (
     ic, nat64, query, update, Principal, Record, Variant,
     Vec, Opt, bool, text, StableBTreeMap, Tuple
 )
+import heapq
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
+# Small integer enums for enumerable text fields: records shrink by
+# tens of bytes and the hot comparisons become int equality checks.
+STATUS_PENDING = 0
+STATUS_COMPLETED = 1
+STATUS_FAILED = 2
+
+_STATUS_CODES = {
+    "pending": STATUS_PENDING,
+    "completed": STATUS_COMPLETED,
+    "failed": STATUS_FAILED,
+}
+
+CATEGORY_PAYMENT_SUCCESS = 0
+CATEGORY_GAS_EFFICIENCY = 1
+CATEGORY_TOKEN_SWAP = 2
+CATEGORY_CROSS_CHAIN = 3
+
+SEVERITY_INFO = 0
+SEVERITY_WARNING = 1
+SEVERITY_CRITICAL = 2
+
+DEX_JUPITER = 0
+
+_DEX_CODES = {"jupiter": DEX_JUPITER}
+
 # Type definitions
 class SolanaTransactionMetrics(Record):
     transaction_signature: text
@@ -42,7 +68,7 @@ class SubscriptionPayment(Record):
     amount: nat64
     token_address: text
     subscription_id: text
-    status: text
+    status: nat64  # STATUS_* enum
     created_at: text
     executed_at: Opt[text]
     gas_cost: nat64
@@ -56,7 +82,7 @@ class TokenSwapMetrics(Record):
     price_impact: nat64
     slippage: nat64
     success: bool
-    dex_used: text
+    dex_used: nat64  # DEX_* enum
     timestamp: text
 
 class ICPCoordinatorMetrics(Record):
@@ -69,14 +95,25 @@ class ICPCoordinatorMetrics(Record):
 
 class PerformanceInsight(Record):
     insight_id: text
-    category: text  # "payment_success", "gas_efficiency", "token_swap", "cross_chain"
-    severity: text   # "info", "warning", "critical"
+    category: nat64  # CATEGORY_* enum
+    severity: nat64  # SEVERITY_* enum
     title: text
     description: text
     recommendation: text
     expected_impact: text
     created_at: text
 
+class SubscriptionAggregates(Record):
+    total_payments: nat64
+    successful_payments: nat64
+    total_volume: nat64
+    total_gas: nat64
+    total_swaps: nat64
+    successful_swaps: nat64
+    swap_volume: nat64
+    slippage_sum: nat64
+    slippage_count: nat64
+
 class ContractHealth(Record):
     health_score: nat64
     overall_status: text
@@ -96,11 +133,11 @@ solana_metrics_storage = StableBTreeMap[text, SolanaTransactionMetrics](
 )
 
 subscription_payments_storage = StableBTreeMap[text, SubscriptionPayment](
-    memory_id=1, max_key_size=1000, max_value_size=300
+    memory_id=1, max_key_size=1000, max_value_size=260
 )
 
 token_swap_metrics_storage = StableBTreeMap[text, TokenSwapMetrics](
-    memory_id=2, max_key_size=1000, max_value_size=350
+    memory_id=2, max_key_size=1000, max_value_size=310
 )
 
 icp_coordinator_storage = StableBTreeMap[text, ICPCoordinatorMetrics](
@@ -108,40 +145,241 @@ icp_coordinator_storage = StableBTreeMap[text, ICPCoordinatorMetrics](
     )
 
 performance_insights_storage = StableBTreeMap[text, PerformanceInsight](
-    memory_id=4, max_key_size=500, max_value_size=500
+    memory_id=4, max_key_size=64, max_value_size=460
 )
 
 contract_health_storage = StableBTreeMap[text, ContractHealth](
     memory_id=5, max_key_size=20, max_value_size=500
 )
 
+# Time indexes: keys sort newest-first (inverted, zero-padded timestamp),
+# so recent-N queries walk the first N keys instead of scanning and
+# sorting every stored value.
+payments_by_time = StableBTreeMap[text, bool](
+    memory_id=6, max_key_size=1024, max_value_size=10
+)
+
+swaps_by_time = StableBTreeMap[text, bool](
+    memory_id=7, max_key_size=1024, max_value_size=10
+)
+
+icp_by_time = StableBTreeMap[text, bool](
+    memory_id=8, max_key_size=128, max_value_size=10
+)
+
+# Running totals maintained on every record_* call, so the metrics
+# queries read one small row instead of scanning every stored value.
+aggregates_storage = StableBTreeMap[text, SubscriptionAggregates](
+    memory_id=9, max_key_size=20, max_value_size=200
+)
+
+_AGGREGATES_KEY = "totals"
+
+# Hot columns (structure-of-arrays): the analyses read only one or two
+# fields per record, so those fields are mirrored into tiny nat64
+# columns. Keys reuse the newest-first time-index layout, so a plain
+# in-order walk yields the most recent N column values without
+# decoding any full record.
+payment_status_column = StableBTreeMap[text, nat64](
+    memory_id=10, max_key_size=1024, max_value_size=20
+)
+
+payment_gas_column = StableBTreeMap[text, nat64](
+    memory_id=11, max_key_size=1024, max_value_size=20
+)
+
+swap_success_column = StableBTreeMap[text, nat64](
+    memory_id=12, max_key_size=1024, max_value_size=20
+)
+
+swap_slippage_column = StableBTreeMap[text, nat64](
+    memory_id=13, max_key_size=1024, max_value_size=20
+)
+
+swap_output_column = StableBTreeMap[text, nat64](
+    memory_id=14, max_key_size=1024, max_value_size=20
+)
+
+icp_success_column = StableBTreeMap[text, nat64](
+    memory_id=15, max_key_size=128, max_value_size=20
+)
+
+_U64_MAX = (1 << 64) - 1
+
+def _time_key(timestamp_ns: int, record_id: str) -> str:
+    """Build an index key that sorts newest-first in the BTreeMap."""
+    return f"{_U64_MAX - timestamp_ns:020d}|{record_id}"
+
+def _load_aggregates() -> SubscriptionAggregates:
+    """Read the single aggregate row, starting from zeros if absent."""
+    aggs = aggregates_storage.get(_AGGREGATES_KEY)
+    if aggs is not None:
+        return aggs
+    return SubscriptionAggregates(
+        total_payments=nat64(0),
+        successful_payments=nat64(0),
+        total_volume=nat64(0),
+        total_gas=nat64(0),
+        total_swaps=nat64(0),
+        successful_swaps=nat64(0),
+        swap_volume=nat64(0),
+        slippage_sum=nat64(0),
+        slippage_count=nat64(0),
+    )
+
+def _apply_payment_delta(payment: SubscriptionPayment, prev: Optional[SubscriptionPayment]):
+    """Fold a new or updated payment into the running aggregate row."""
+    aggs = _load_aggregates()
+    total = int(aggs.total_payments)
+    successful = int(aggs.successful_payments)
+    volume = int(aggs.total_volume)
+    gas = int(aggs.total_gas)
+
+    if prev is None:
+        total += 1
+    else:
+        # Re-recorded payment: subtract its old contribution first
+        successful -= prev.status == STATUS_COMPLETED
+        volume -= int(prev.amount)
+        gas -= int(prev.gas_cost)
+
+    successful += payment.status == STATUS_COMPLETED
+    volume += int(payment.amount)
+    gas += int(payment.gas_cost)
+
+    aggregates_storage.insert(_AGGREGATES_KEY, SubscriptionAggregates(
+        total_payments=nat64(total),
+        successful_payments=nat64(successful),
+        total_volume=nat64(volume),
+        total_gas=nat64(gas),
+        total_swaps=aggs.total_swaps,
+        successful_swaps=aggs.successful_swaps,
+        swap_volume=aggs.swap_volume,
+        slippage_sum=aggs.slippage_sum,
+        slippage_count=aggs.slippage_count,
+    ))
+
+def _apply_swap_delta(swap: TokenSwapMetrics, prev: Optional[TokenSwapMetrics]):
+    """Fold a new or updated swap into the running aggregate row."""
+    aggs = _load_aggregates()
+    total = int(aggs.total_swaps)
+    successful = int(aggs.successful_swaps)
+    volume = int(aggs.swap_volume)
+    slippage_sum = int(aggs.slippage_sum)
+    slippage_count = int(aggs.slippage_count)
+
+    if prev is None:
+        total += 1
+    else:
+        successful -= 1 if prev.success else 0
+        volume -= int(prev.output_amount)
+        if prev.slippage > 0:
+            slippage_sum -= int(prev.slippage)
+            slippage_count -= 1
+
+    successful += 1 if swap.success else 0
+    volume += int(swap.output_amount)
+    if swap.slippage > 0:
+        slippage_sum += int(swap.slippage)
+        slippage_count += 1
+
+    aggregates_storage.insert(_AGGREGATES_KEY, SubscriptionAggregates(
+        total_payments=aggs.total_payments,
+        successful_payments=aggs.successful_payments,
+        total_volume=aggs.total_volume,
+        total_gas=aggs.total_gas,
+        total_swaps=nat64(total),
+        successful_swaps=nat64(successful),
+        swap_volume=nat64(volume),
+        slippage_sum=nat64(slippage_sum),
+        slippage_count=nat64(slippage_count),
+    ))
+
+# Write-behind buffer: insights accumulate on the heap and flush to
+# stable memory in batches, so the transaction hot path pays the
+# per-insert stable-memory cost once every few transactions.
+_INSIGHT_FLUSH_EVERY = 16
+
+# With deterministic category:severity ids the map is naturally
+# bounded; the cap only ever evicts legacy timestamp-keyed rows.
+INSIGHT_CAP = 256
+
+_pending_insights: list = []
+_pending_health_dirty = False
+_tx_since_flush = 0
+
+# Most recent severity flushed or queued per category, so repeated
+# detections of an unchanged condition are not re-recorded
+_last_insight_severity: Dict[int, int] = {}
+
+# Fingerprint of the inputs the health assessment depends on, so a run
+# of indistinguishable transactions marks health stale only once
+_last_health_inputs = None
+
+def _health_inputs(tx_success) -> tuple:
+    """Cheap O(1) fingerprint of what the health assessment reads."""
+    return (
+        subscription_payments_storage.len(),
+        token_swap_metrics_storage.len(),
+        icp_coordinator_storage.len(),
+        bool(tx_success),
+    )
+
+def _buffer_insights(insights):
+    """Queue insights, dropping repeats of each category's current state."""
+    for insight in insights:
+        category = int(insight.category)
+        severity = int(insight.severity)
+        if _last_insight_severity.get(category) == severity:
+            continue
+        _last_insight_severity[category] = severity
+        _pending_insights.append(insight)
+
+def _flush_pending_insights():
+    """Insert buffered insights in one pass and refresh health if stale."""
+    global _pending_health_dirty, _tx_since_flush
+
+    # Evict the oldest rows so storage stays bounded at INSIGHT_CAP
+    overflow = performance_insights_storage.len() + len(_pending_insights) - INSIGHT_CAP
+    if overflow > 0:
+        for insight_id in performance_insights_storage.keys()[:overflow]:
+            performance_insights_storage.remove(insight_id)
+
+    for insight in _pending_insights:
+        performance_insights_storage.insert(insight.insight_id, insight)
+    _pending_insights.clear()
+    _tx_since_flush = 0
+    if _pending_health_dirty:
+        update_contract_health()
+        _pending_health_dirty = False
+
 # Solana contract constants (would be fetched from contract)
 SOLANA_PROGRAM_ID = "7c1tGePFVT3ztPEESfzG7gFqYiCJUDjFa7PCeyMSYtub"
 USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
 JUPITER_ROUTER = "JUP6LkbZbjS1j9wapKHNAE2vkkEqtKQKqPc2uqH6n"
 
-def analyze_payment_success_rate(payments: List[SubscriptionPayment]) -> dict:
-    """Analyze subscription payment success rates from Solana contract."""
-    if len(payments) == 0:
+def analyze_payment_success_rate(statuses: List[int]) -> dict:
+    """Analyze subscription payment success rates from the status column.
+
+    statuses holds the STATUS_* codes of recent payments, newest first.
+    """
+    total = len(statuses)
+    if total == 0:
         return {"success_rate": 0, "trend": "no_data"}
 
-    successful = len([p for p in payments if p.status == "completed"])
-    total = len(payments)
-    success_rate = int((successful / total) * 10000)
-
-    # Analyze trend (last 10 vs previous 10)
-    if len(payments) >= 20:
-        recent = payments[-10:]
-        previous = payments[-20:-10]
-        recent_success = len([p for p in recent if p.status == "completed"])
-        previous_success = len([p for p in previous if p.status == "completed"])
-
-        if recent_success > previous_success + 2:
-            trend = "improving"
-        elif recent_success < previous_success - 2:
-            trend = "declining"
-        else:
-            trend = "stable"
+    successful = 0
+    for status in statuses:
+        if status == STATUS_COMPLETED:
+            successful += 1
+    success_rate = (successful * 10000) // total
+
+    # Analyze trend (last 10 vs previous 10; input is newest first)
+    if total >= 20:
+        recent_success = sum(1 for s in statuses[:10] if s == STATUS_COMPLETED)
+        previous_success = sum(1 for s in statuses[10:20] if s == STATUS_COMPLETED)
+
+        delta = recent_success - previous_success
+        trend = _TRENDS[1 + (delta > 2) - (delta < -2)]
     else:
         trend = "insufficient_data"
 
@@ -152,53 +390,73 @@ def analyze_payment_success_rate(payments: List[SubscriptionPayment]) -> dict:
         "successful_count": successful
     }
 
-def analyze_gas_efficiency(payments: List[SubscriptionPayment]) -> dict:
-    """Analyze gas efficiency of Solana contract operations."""
-    if len(payments) == 0:
-        return {"efficiency_score": 0, "average_gas": 0, "trend": "no_data"}
-
-    gas_costs = [p.gas_cost for p in payments if p.gas_cost > 0]
-    if len(gas_costs) == 0:
+def _bp_to_pct(bp: int) -> str:
+    """Format basis points as a one-decimal percentage without floats."""
+    whole, tenth = divmod(int(bp) // 10, 10)
+    return f"{whole}.{tenth}"
+
+# Branchless trend classify: index with 1 + improving_flag - declining_flag
+_TRENDS = ("declining", "stable", "improving")
+
+# Target: 500,000 gas per complex subscription operation
+_TARGET_GAS = 500000
+_GAS_IMPROVING_BELOW = _TARGET_GAS * 90 // 100
+_GAS_DECLINING_ABOVE = _TARGET_GAS * 110 // 100
+
+def _gas_reduce(gas_sum: int, gas_count: int) -> tuple:
+    """Pure integer kernel: average gas, efficiency score and trend."""
+    average_gas = gas_sum // gas_count
+    efficiency_score = min(10000, (_TARGET_GAS * 10000) // max(1, average_gas))
+
+    # Simplified comparison against the target band
+    trend = _TRENDS[
+        1 + (average_gas < _GAS_IMPROVING_BELOW) - (average_gas > _GAS_DECLINING_ABOVE)
+    ]
+
+    return average_gas, efficiency_score, trend
+
+def analyze_gas_efficiency(gas_costs: List[int]) -> dict:
+    """Analyze gas efficiency from the gas column of recent payments."""
+    gas_sum = 0
+    gas_count = 0
+    for gas_cost in gas_costs:
+        if gas_cost > 0:
+            gas_sum += gas_cost
+            gas_count += 1
+
+    if gas_count == 0:
         return {"efficiency_score": 0, "average_gas": 0, "trend": "no_data"}
 
-    average_gas = sum(gas_costs) // len(gas_costs)
-
-    # Target: 500,000 gas per complex subscription operation
-    target_gas = 500000
-    efficiency_score = min(10000, int((target_gas / max(1, average_gas)) * 10000))
-
-    # Determine trend
-    recent_gas = average_gas
-    older_gas = target_gas  # Simplified comparison
-
-    if recent_gas < older_gas * 90 // 100:
-        trend = "improving"
-    elif recent_gas > older_gas * 110 // 100:
-        trend = "declining"
-    else:
-        trend = "stable"
+    average_gas, efficiency_score, trend = _gas_reduce(gas_sum, gas_count)
 
     return {
         "efficiency_score": efficiency_score,
         "average_gas": average_gas,
         "trend": trend,
-        "total_transactions": len(gas_costs)
+        "total_transactions": gas_count
     }
 
-def analyze_token_swaps(swaps: List[TokenSwapMetrics]) -> dict:
-    """Analyze Jupiter DEX token swap performance."""
-    if len(swaps) == 0:
+def analyze_token_swaps(successes: List[int], slippages: List[int], outputs: List[int]) -> dict:
+    """Analyze Jupiter DEX token swap performance from swap columns."""
+    total_swaps = len(successes)
+    if total_swaps == 0:
         return {"success_rate": 0, "average_slippage": 0, "trend": "no_data"}
 
-    successful_swaps = [s for s in swaps if s.success]
-    total_swaps = len(swaps)
-    success_rate = int((len(successful_swaps) / total_swaps) * 10000)
-
-    slippages = [int(s.slippage) for s in successful_swaps if s.slippage > 0]
-    average_slippage = sum(slippages) // max(1, len(slippages))
-
-    # Volume tracking
-    total_volume = sum(int(s.output_amount) for s in successful_swaps)
+    # One pass: success count, slippage mean and volume together
+    successful_count = 0
+    slippage_sum = 0
+    slippage_count = 0
+    total_volume = 0
+    for success, slippage, output in zip(successes, slippages, outputs):
+        if success:
+            successful_count += 1
+            total_volume += output
+            if slippage > 0:
+                slippage_sum += slippage
+                slippage_count += 1
+
+    success_rate = (successful_count * 10000) // total_swaps
+    average_slippage = slippage_sum // max(1, slippage_count)
 
     return {
         "success_rate": success_rate,
@@ -208,81 +466,141 @@ def analyze_token_swaps(swaps: List[TokenSwapMetrics]) -> dict:
         "total_swaps": total_swaps
     }
 
+# Memo for detect_performance_patterns: when the stored window has the
+# same composition as last time, the analyses would produce identical
+# insights, so the three recent-data fetches can be skipped entirely.
+_pattern_cache = {"sig": None, "insights": []}
+_last_payment_id = ""
+
+def _pattern_signature() -> tuple:
+    """Cheap O(1) fingerprint of the data the pattern rules read."""
+    return (
+        subscription_payments_storage.len(),
+        token_swap_metrics_storage.len(),
+        icp_coordinator_storage.len(),
+        _last_payment_id,
+    )
+
+def _fused_payment_metrics(statuses: List[int], gas_costs: List[int]) -> tuple:
+    """One pass over both payment columns: success rate, efficiency, avg gas.
+
+    Fuses the loops of analyze_payment_success_rate and
+    analyze_gas_efficiency for callers that need both.
+    """
+    total = len(statuses)
+    if total == 0:
+        return 0, 0, 0
+
+    successful = 0
+    gas_sum = 0
+    gas_count = 0
+    for status, gas_cost in zip(statuses, gas_costs):
+        if status == STATUS_COMPLETED:
+            successful += 1
+        if gas_cost > 0:
+            gas_sum += gas_cost
+            gas_count += 1
+
+    success_rate = (successful * 10000) // total
+    if gas_count == 0:
+        return success_rate, 0, 0
+
+    average_gas, efficiency_score, _ = _gas_reduce(gas_sum, gas_count)
+    return success_rate, efficiency_score, average_gas
+
 def detect_performance_patterns() -> List[PerformanceInsight]:
     """Detect patterns in contract performance."""
+    sig = _pattern_signature()
+    if sig == _pattern_cache["sig"]:
+        return _pattern_cache["insights"]
+
     insights = []
+    now = ic.time()
+
+    # Get recent hot columns, but only when a storage holds enough rows
+    # for any rule to fire (len() is O(1)), and fetch no more than the
+    # rules actually analyze: 20 payments (trend window), 5 swaps, 5
+    # ICP coordinations
+    payment_statuses, payment_gas = [], []
+    if subscription_payments_storage.len() >= 5:
+        payment_statuses, payment_gas = _recent_payment_columns(20)
 
-    # Get recent data
-    recent_payments = get_recent_payments(100)
-    recent_swaps = get_recent_swaps(50)
-    recent_icp_metrics = get_recent_icp_metrics(20)
+    swap_successes, swap_slippages, swap_outputs = [], [], []
+    if token_swap_metrics_storage.len() >= 5:
+        swap_successes, swap_slippages, swap_outputs = _recent_swap_columns(5)
+
+    icp_successes = []
+    if icp_coordinator_storage.len() >= 5:
+        icp_successes = _recent_icp_successes(5)
 
     # Payment success rate analysis
-    if len(recent_payments) >= 10:
-        payment_analysis = analyze_payment_success_rate(recent_payments)
+    if len(payment_statuses) >= 10:
+        payment_analysis = analyze_payment_success_rate(payment_statuses)
 
         if payment_analysis["success_rate"] < 9000:  # Below 90%
-            severity = "critical" if payment_analysis["success_rate"] < 8000 else "warning"
+            severity = SEVERITY_CRITICAL if payment_analysis["success_rate"] < 8000 else SEVERITY_WARNING
             insights.append(PerformanceInsight(
-                insight_id=text(f"payment_success_low_{ic.time()}"),
-                category=text("payment_success"),
-                severity=text(severity),
+                insight_id=text(f"{CATEGORY_PAYMENT_SUCCESS}:{severity}"),
+                category=nat64(CATEGORY_PAYMENT_SUCCESS),
+                severity=nat64(severity),
                 title=text("Low Payment Success Rate"),
-                description=text(f"Payment success rate is {payment_analysis['success_rate']/100:.1f}%, which is below target"),
+                description=text(f"Payment success rate is {_bp_to_pct(payment_analysis['success_rate'])}%, which is below target"),
                 recommendation=text("Investigate transaction failures and optimize error handling"),
                 expected_impact=text("15-25% improvement in revenue retention"),
-                created_at=text(ic.time())
+                created_at=str(now)
             ))
 
     # Gas efficiency analysis
-    if len(recent_payments) >= 5:
-        gas_analysis = analyze_gas_efficiency(recent_payments)
+    if len(payment_gas) >= 5:
+        gas_analysis = analyze_gas_efficiency(payment_gas)
 
         if gas_analysis["efficiency_score"] < 8000:  # Below 80%
-            severity = "critical" if gas_analysis["efficiency_score"] < 6000 else "warning"
+            severity = SEVERITY_CRITICAL if gas_analysis["efficiency_score"] < 6000 else SEVERITY_WARNING
             insights.append(PerformanceInsight(
-                insight_id=text(f"gas_inefficient_{ic.time()}"),
-                category=text("gas_efficiency"),
-                severity=text(severity),
+                insight_id=text(f"{CATEGORY_GAS_EFFICIENCY}:{severity}"),
+                category=nat64(CATEGORY_GAS_EFFICIENCY),
+                severity=nat64(severity),
                 title=text("High Gas Costs"),
-                description=text(f"Average gas per transaction is {gas_analysis['average_gas']:,} ({gas_analysis['efficiency_score']/100:.1f}% efficiency)"),
+                description=text(f"Average gas per transaction is {gas_analysis['average_gas']:,} ({_bp_to_pct(gas_analysis['efficiency_score'])}% efficiency)"),
                 recommendation=text("Optimize instruction ordering and batch similar operations"),
                 expected_impact=text("20-30% reduction in gas costs"),
-                created_at=text(ic.time())
+                created_at=str(now)
             ))
 
     # Token swap analysis
-    if len(recent_swaps) >= 5:
-        swap_analysis = analyze_token_swaps(recent_swaps)
+    if len(swap_successes) >= 5:
+        swap_analysis = analyze_token_swaps(swap_successes, swap_slippages, swap_outputs)
 
         if swap_analysis["success_rate"] < 9500:  # Below 95%
             insights.append(PerformanceInsight(
-                insight_id=text(f"swap_failures_{ic.time()}"),
-                category=text("token_swap"),
-                severity=text("warning"),
+                insight_id=text(f"{CATEGORY_TOKEN_SWAP}:{SEVERITY_WARNING}"),
+                category=nat64(CATEGORY_TOKEN_SWAP),
+                severity=nat64(SEVERITY_WARNING),
                 title=text("Token Swap Issues"),
-                description=text(f"Jupiter swap success rate is {swap_analysis['success_rate']/100:.1f}%"),
+                description=text(f"Jupiter swap success rate is {_bp_to_pct(swap_analysis['success_rate'])}%"),
                 recommendation=text("Add retry logic and improve liquidity management"),
                 expected_impact=text("10-15% improvement in conversion success"),
-                created_at=text(ic.time())
+                created_at=str(now)
             ))
 
     # ICP coordination analysis
-    if len(recent_icp_metrics) >= 5:
-        icp_success_rate = len([m for m in recent_icp_metrics if m.coordination_success]) / len(recent_icp_metrics)
+    if len(icp_successes) >= 5:
+        icp_success_bp = (sum(icp_successes) * 10000) // len(icp_successes)
 
-        if icp_success_rate < 0.9:
+        if icp_success_bp < 9000:
             insights.append(PerformanceInsight(
-                insight_id=text(f"icp_coordination_issues_{ic.time()}"),
-                category=text("cross_chain"),
-                severity=text("warning"),
+                insight_id=text(f"{CATEGORY_CROSS_CHAIN}:{SEVERITY_WARNING}"),
+                category=nat64(CATEGORY_CROSS_CHAIN),
+                severity=nat64(SEVERITY_WARNING),
                 title=text("ICP Coordination Issues"),
-                description=text(f"ICP-Solana coordination success rate is {icp_success_rate*100:.1f}%"),
+                description=text(f"ICP-Solana coordination success rate is {_bp_to_pct(icp_success_bp)}%"),
                 recommendation=text("Optimize ICP timer canister and retry mechanisms"),
                 expected_impact=text("5-10% improvement in cross-chain reliability"),
-                created_at=text(ic.time())
+                created_at=str(now)
             ))
 
+    _pattern_cache["sig"] = sig
+    _pattern_cache["insights"] = insights
     return insights
 
 # Kybra canister methods
@@ -294,29 +612,43 @@ def record_solana_transaction(transaction_data: dict) -> bool:
     This monitors how well the core Solana contract is performing.
     """
 
-    tx_signature = text(transaction_data.get("signature", ""))
+    # Values from the payload are already str/int; Kybra validates on
+    # construction, so per-field text()/nat64() coercion is dropped
+    tx_signature = transaction_data.get("signature", "")
+    now_ns = ic.time()
 
     metrics = SolanaTransactionMetrics(
         transaction_signature=tx_signature,
-        slot=nat64(transaction_data.get("slot", 0)),
-        block_time=nat64(transaction_data.get("blockTime", 0)),
-        gas_used=nat64(transaction_data.get("gasUsed", 0)),
+        slot=transaction_data.get("slot", 0),
+        block_time=transaction_data.get("blockTime", 0),
+        gas_used=transaction_data.get("gasUsed", 0),
         success=bool(transaction_data.get("success", False)),
-        error_code=Opt[text](text(transaction_data.get("errorCode", ""))),
-        program_id=text(transaction_data.get("programId", "")),
-        instruction_count=nat64(transaction_data.get("instructionCount", 0)),
-        timestamp=text(ic.time())
+        error_code=Opt[text](transaction_data.get("errorCode", "")),
+        program_id=transaction_data.get("programId", ""),
+        instruction_count=transaction_data.get("instructionCount", 0),
+        timestamp=str(now_ns)
     )
 
     solana_metrics_storage.insert(tx_signature, metrics)
 
-    # Trigger pattern detection
-    insights = detect_performance_patterns()
-    for insight in insights:
-        performance_insights_storage.insert(insight.insight_id, insight)
-
-    # Update contract health
-    update_contract_health()
+    # Trigger pattern detection; buffer the results instead of paying
+    # one stable insert per insight per transaction
+    global _pending_health_dirty, _tx_since_flush, _last_health_inputs
+    _buffer_insights(detect_performance_patterns())
+
+    # Only mark health stale when the input fingerprint moved; a run of
+    # indistinguishable transactions leaves the assessment untouched
+    inputs = _health_inputs(metrics.success)
+    if inputs != _last_health_inputs:
+        _last_health_inputs = inputs
+        _pending_health_dirty = True
+    _tx_since_flush += 1
+
+    # Failures flush immediately so alerts fire without batching delay
+    if (not metrics.success
+            or len(_pending_insights) >= _INSIGHT_FLUSH_EVERY
+            or _tx_since_flush >= _INSIGHT_FLUSH_EVERY):
+        _flush_pending_insights()
 
     return True
 
@@ -326,22 +658,35 @@ def record_subscription_payment(payment_data: dict) -> bool:
     Record subscription payment metrics from Solana contract.
     """
 
-    payment_id = text(payment_data.get("paymentId", ""))
+    payment_id = payment_data.get("paymentId", "")
+
+    # Parse the timestamp once; the text field keeps it for display and
+    # the time index consumes the integer directly
+    created_ns = int(payment_data.get("createdAt", ic.time()))
 
     payment = SubscriptionPayment(
         payment_id=payment_id,
-        merchant_address=text(payment_data.get("merchantAddress", "")),
-        user_wallet=text(payment_data.get("userWallet", "")),
-        amount=nat64(payment_data.get("amount", 0)),
-        token_address=text(payment_data.get("tokenAddress", "")),
-        subscription_id=text(payment_data.get("subscriptionId", "")),
-        status=text(payment_data.get("status", "pending")),
-        created_at=text(payment_data.get("createdAt", ic.time())),
-        executed_at=Opt[text](text(payment_data.get("executedAt", ""))),
-        gas_cost=nat64(payment_data.get("gasCost", 0))
+        merchant_address=payment_data.get("merchantAddress", ""),
+        user_wallet=payment_data.get("userWallet", ""),
+        amount=payment_data.get("amount", 0),
+        token_address=payment_data.get("tokenAddress", ""),
+        subscription_id=payment_data.get("subscriptionId", ""),
+        status=_STATUS_CODES.get(payment_data.get("status", "pending"), STATUS_PENDING),
+        created_at=str(created_ns),
+        executed_at=Opt[text](payment_data.get("executedAt", "")),
+        gas_cost=payment_data.get("gasCost", 0)
     )
 
+    global _last_payment_id
+    _last_payment_id = str(payment_id)
+
+    prev = subscription_payments_storage.get(payment_id)
     subscription_payments_storage.insert(payment_id, payment)
+    _apply_payment_delta(payment, prev)
+    time_key = _time_key(created_ns, payment_id)
+    payments_by_time.insert(time_key, True)
+    payment_status_column.insert(time_key, payment.status)
+    payment_gas_column.insert(time_key, payment.gas_cost)
     return True
 
 @update
@@ -350,22 +695,30 @@ def record_token_swap(swap_data: dict) -> bool:
     Record token swap metrics from Jupiter DEX integration.
     """
 
-    swap_id = text(swap_data.get("swapId", ""))
+    swap_id = swap_data.get("swapId", "")
+    now_ns = ic.time()
 
     swap = TokenSwapMetrics(
         swap_id=swap_id,
-        input_token=text(swap_data.get("inputToken", "")),
-        output_token=text(swap_data.get("outputToken", "")),
-        input_amount=nat64(swap_data.get("inputAmount", 0)),
-        output_amount=nat64(swap_data.get("outputAmount", 0)),
-        price_impact=nat64(swap_data.get("priceImpact", 0)),
-        slippage=nat64(swap_data.get("slippage", 0)),
+        input_token=swap_data.get("inputToken", ""),
+        output_token=swap_data.get("outputToken", ""),
+        input_amount=swap_data.get("inputAmount", 0),
+        output_amount=swap_data.get("outputAmount", 0),
+        price_impact=swap_data.get("priceImpact", 0),
+        slippage=swap_data.get("slippage", 0),
         success=bool(swap_data.get("success", False)),
-        dex_used=text(swap_data.get("dexUsed", "jupiter")),
-        timestamp=text(ic.time())
+        dex_used=_DEX_CODES.get(swap_data.get("dexUsed", "jupiter"), DEX_JUPITER),
+        timestamp=str(now_ns)
     )
 
+    prev = token_swap_metrics_storage.get(swap_id)
     token_swap_metrics_storage.insert(swap_id, swap)
+    _apply_swap_delta(swap, prev)
+    time_key = _time_key(now_ns, swap_id)
+    swaps_by_time.insert(time_key, True)
+    swap_success_column.insert(time_key, 1 if swap.success else 0)
+    swap_slippage_column.insert(time_key, swap.slippage)
+    swap_output_column.insert(time_key, swap.output_amount)
     return True
 
 @update
@@ -374,18 +727,22 @@ def record_icp_coordination(coordination_data: dict) -> bool:
     Record ICP coordination metrics for cross-chain performance.
     """
 
-    timer_canister_id = text(coordination_data.get("timerCanisterId", ""))
+    timer_canister_id = coordination_data.get("timerCanisterId", "")
+    now_ns = ic.time()
 
     metrics = ICPCoordinatorMetrics(
         timer_canister_id=timer_canister_id,
         coordination_success=bool(coordination_data.get("success", False)),
-        execution_time_ms=nat64(coordination_data.get("executionTimeMs", 0)),
-        solana_tx_signature=text(coordination_data.get("solanaTxSignature", "")),
-        error_message=Opt[text](text(coordination_data.get("errorMessage", ""))),
-        timestamp=text(ic.time())
+        execution_time_ms=coordination_data.get("executionTimeMs", 0),
+        solana_tx_signature=coordination_data.get("solanaTxSignature", ""),
+        error_message=Opt[text](coordination_data.get("errorMessage", "")),
+        timestamp=str(now_ns)
     )
 
     icp_coordinator_storage.insert(timer_canister_id, metrics)
+    time_key = _time_key(now_ns, timer_canister_id)
+    icp_by_time.insert(time_key, True)
+    icp_success_column.insert(time_key, 1 if metrics.coordination_success else 0)
     return True
 
 @query
@@ -394,32 +751,32 @@ def get_contract_health() -> ContractHealth:
     Get overall contract health assessment.
     Monitors how well the core Solana contract is working.
     """
+    if _cached_health is not None:
+        return _cached_health
+    return _compute_contract_health()
+
+def _compute_contract_health() -> ContractHealth:
+    """Recompute the health assessment from recent hot columns."""
+    payment_statuses, payment_gas = _recent_payment_columns(50)
+    swap_successes, swap_slippages, swap_outputs = _recent_swap_columns(25)
+    icp_successes = _recent_icp_successes(10)
+
+    # Calculate key metrics; the payment columns are walked exactly once
+    payment_success_rate, gas_efficiency, _average_gas = _fused_payment_metrics(
+        payment_statuses, payment_gas
+    )
 
-    recent_payments = get_recent_payments(50)
-    recent_swaps = get_recent_swaps(25)
-    recent_icp_metrics = get_recent_icp_metrics(10)
-
-    # Calculate key metrics
-    if len(recent_payments) > 0:
-        payment_analysis = analyze_payment_success_rate(recent_payments)
-        payment_success_rate = payment_analysis["success_rate"]
-    else:
-        payment_success_rate = nat64(0)
-
-    if len(recent_swaps) > 0:
-        swap_analysis = analyze_token_swaps(recent_swaps)
+    if len(swap_successes) > 0:
+        swap_analysis = analyze_token_swaps(swap_successes, swap_slippages, swap_outputs)
         swap_success_rate = swap_analysis["success_rate"]
     else:
         swap_success_rate = nat64(0)
 
-    if len(recent_icp_metrics) > 0:
-        icp_success_rate = int((len([m for m in recent_icp_metrics if m.coordination_success]) / len(recent_icp_metrics)) * 10000)
+    if len(icp_successes) > 0:
+        icp_success_rate = (sum(icp_successes) * 10000) // len(icp_successes)
     else:
         icp_success_rate = nat64(10000)  # 100% if no data
 
-    gas_analysis = analyze_gas_efficiency(recent_payments)
-    gas_efficiency = gas_analysis["efficiency_score"]
-
     # Grid integration health (simplified - would monitor actual Grid API calls)
     grid_health = nat64(9500)  # 95% assumed health
 
@@ -437,13 +794,13 @@ def get_contract_health() -> ContractHealth:
     # Generate alerts
     alerts = []
     if payment_success_rate < 9000:
-        alerts.append(text(f"Low payment success rate: {payment_success_rate/100:.1f}%"))
+        alerts.append(text(f"Low payment success rate: {_bp_to_pct(payment_success_rate)}%"))
     if swap_success_rate < 9500:
-        alerts.append(text(f"Token swap issues: {swap_success_rate/100:.1f}%"))
+        alerts.append(text(f"Token swap issues: {_bp_to_pct(swap_success_rate)}%"))
     if gas_efficiency < 8000:
-        alerts.append(text(f"High gas costs: {gas_efficiency/100:.1f}% efficiency"))
+        alerts.append(text(f"High gas costs: {_bp_to_pct(gas_efficiency)}% efficiency"))
     if icp_success_rate < 9000:
-        alerts.append(text(f"ICP coordination issues: {icp_success_rate/100:.1f}%"))
+        alerts.append(text(f"ICP coordination issues: {_bp_to_pct(icp_success_rate)}%"))
 
     return ContractHealth(
         health_score=nat64(health_score),
@@ -465,11 +822,10 @@ def get_performance_insights() -> Vec[PerformanceInsight]:
     Get current performance insights and recommendations.
     """
 
-    insights = []
-    for insight_id in performance_insights_storage.keys():
-        insight = performance_insights_storage.get(insight_id)
-        if insight is not None:
-            insights.append(insight)
+    insights = list(performance_insights_storage.values())
+
+    # Include buffered insights that have not been flushed yet
+    insights.extend(_pending_insights)
 
     return Vec[PerformanceInsight](insights)
 
@@ -479,13 +835,28 @@ def get_subscription_metrics() -> dict:
     Get comprehensive subscription payment metrics.
     """
 
-    all_payments = []
-    for payment_id in subscription_payments_storage.keys():
-        payment = subscription_payments_storage.get(payment_id)
-        if payment is not None:
-            all_payments.append(payment)
+    aggs = _load_aggregates()
+    total_payments = int(aggs.total_payments)
 
-    if len(all_payments) == 0:
+    if total_payments == subscription_payments_storage.len():
+        # Running totals cover every stored row: O(1) path
+        successful_payments = int(aggs.successful_payments)
+        total_volume = int(aggs.total_volume)
+        total_gas = int(aggs.total_gas)
+    else:
+        # Rows predating the aggregate row: fall back to a full scan
+        total_payments = 0
+        successful_payments = 0
+        total_volume = 0
+        total_gas = 0
+        for p in subscription_payments_storage.values():
+            total_payments += 1
+            if p.status == STATUS_COMPLETED:
+                successful_payments += 1
+            total_volume += int(p.amount)
+            total_gas += int(p.gas_cost)
+
+    if total_payments == 0:
         return {
             "total_payments": 0,
             "successful_payments": 0,
@@ -493,16 +864,11 @@ def get_subscription_metrics() -> dict:
             "average_gas_cost": 0
         }
 
-    total_payments = len(all_payments)
-    successful_payments = len([p for p in all_payments if p.status == "completed"])
-    total_volume = sum(int(p.amount) for p in all_payments)
-    total_gas = sum(int(p.gas_cost) for p in all_payments)
-
     return {
         "total_payments": total_payments,
         "successful_payments": successful_payments,
         "total_volume": total_volume,
-        "success_rate": int((successful_payments / total_payments) * 100),
+        "success_rate": (successful_payments * 100) // total_payments,
         "average_gas_cost": total_gas // max(1, total_payments),
         "trend": "stable"  # Would calculate actual trend
     }
@@ -513,13 +879,32 @@ def get_swap_metrics() -> dict:
     Get comprehensive token swap metrics.
     """
 
-    all_swaps = []
-    for swap_id in token_swap_metrics_storage.keys():
-        swap = token_swap_metrics_storage.get(swap_id)
-        if swap is not None:
-            all_swaps.append(swap)
+    aggs = _load_aggregates()
+    total_swaps = int(aggs.total_swaps)
 
-    if len(all_swaps) == 0:
+    if total_swaps == token_swap_metrics_storage.len():
+        # Running totals cover every stored row: O(1) path
+        successful_swaps = int(aggs.successful_swaps)
+        total_volume = int(aggs.swap_volume)
+        slippage_sum = int(aggs.slippage_sum)
+        slippage_count = int(aggs.slippage_count)
+    else:
+        # Rows predating the aggregate row: fall back to a full scan
+        total_swaps = 0
+        successful_swaps = 0
+        total_volume = 0
+        slippage_sum = 0
+        slippage_count = 0
+        for s in token_swap_metrics_storage.values():
+            total_swaps += 1
+            if s.success:
+                successful_swaps += 1
+            total_volume += int(s.output_amount)
+            if s.slippage > 0:
+                slippage_sum += int(s.slippage)
+                slippage_count += 1
+
+    if total_swaps == 0:
         return {
             "total_swaps": 0,
             "successful_swaps": 0,
@@ -527,56 +912,130 @@ def get_swap_metrics() -> dict:
             "average_slippage": 0
         }
 
-    total_swaps = len(all_swaps)
-    successful_swaps = len([s for s in all_swaps if s.success])
-    total_volume = sum(int(s.output_amount) for s in all_swaps)
-    slippages = [int(s.slippage) for s in all_swaps if s.slippage > 0]
-
     return {
         "total_swaps": total_swaps,
         "successful_swaps": successful_swaps,
         "total_volume": total_volume,
-        "success_rate": int((successful_swaps / total_swaps) * 100),
-        "average_slippage": sum(slippages) // max(1, len(slippages))
+        "success_rate": (successful_swaps * 100) // total_swaps,
+        "average_slippage": slippage_sum // max(1, slippage_count)
     }
 
 # Helper functions
 
+def _recent_from_index(index, storage, count: int) -> list:
+    """Walk a newest-first time index, reading only the first count values."""
+    records = []
+    seen = set()
+    for index_key in index.keys():
+        if len(records) >= count:
+            break
+        record_id = str(index_key).split("|", 1)[1]
+        if record_id in seen:
+            continue
+        seen.add(record_id)
+        record = storage.get(text(record_id))
+        if record is not None:
+            records.append(record)
+    return records
+
 def get_recent_payments(count: int) -> List[SubscriptionPayment]:
-    """Get recent subscription payments."""
-    payments = []
-    for payment_id in subscription_payments_storage.keys():
-        payment = subscription_payments_storage.get(payment_id)
-        if payment is not None:
-            payments.append(payment)
+    """Get recent subscription payments, newest first."""
+    if payments_by_time.len() < subscription_payments_storage.len():
+        # Rows predating the time index: fall back to a bounded scan.
+        return heapq.nlargest(
+            count, subscription_payments_storage.values(),
+            key=lambda x: int(x.created_at)
+        )
 
-    # Return most recent payments
-    return sorted(payments, key=lambda x: int(x.created_at), reverse=True)[:count]
+    return _recent_from_index(payments_by_time, subscription_payments_storage, count)
 
 def get_recent_swaps(count: int) -> List[TokenSwapMetrics]:
-    """Get recent token swaps."""
-    swaps = []
-    for swap_id in token_swap_metrics_storage.keys():
-        swap = token_swap_metrics.get(swap_id)
-        if swap is not None:
-            swaps.append(swap)
+    """Get recent token swaps, newest first."""
+    if swaps_by_time.len() < token_swap_metrics_storage.len():
+        return heapq.nlargest(
+            count, token_swap_metrics_storage.values(),
+            key=lambda x: int(x.timestamp)
+        )
 
-    return sorted(swaps, key=lambda x: int(x.timestamp), reverse=True)[:count]
+    return _recent_from_index(swaps_by_time, token_swap_metrics_storage, count)
 
 def get_recent_icp_metrics(count: int) -> List[ICPCoordinatorMetrics]:
-    """Get recent ICP coordination metrics."""
-    metrics = []
-    for metrics_id in icp_coordinator_storage.keys():
-        metric = icp_coordinator_storage.get(metrics_id)
-        if metric is not None:
-            metrics.append(metric)
-
-    return sorted(metrics, key=lambda x: int(x.timestamp), reverse=True)[:count]
+    """Get recent ICP coordination metrics, newest first."""
+    if icp_by_time.len() < icp_coordinator_storage.len():
+        return heapq.nlargest(
+            count, icp_coordinator_storage.values(),
+            key=lambda x: int(x.timestamp)
+        )
+
+    return _recent_from_index(icp_by_time, icp_coordinator_storage, count)
+
+def _recent_payment_columns(count: int) -> tuple:
+    """Newest-first status and gas columns for the last count payments."""
+    if payment_status_column.len() < subscription_payments_storage.len():
+        # Rows predating the columns: project from the full records
+        payments = get_recent_payments(count)
+        return [int(p.status) for p in payments], [int(p.gas_cost) for p in payments]
+
+    statuses = []
+    gas_costs = []
+    for status, gas_cost in zip(payment_status_column.values(), payment_gas_column.values()):
+        if len(statuses) >= count:
+            break
+        statuses.append(int(status))
+        gas_costs.append(int(gas_cost))
+    return statuses, gas_costs
+
+def _recent_swap_columns(count: int) -> tuple:
+    """Newest-first success, slippage and output columns for recent swaps."""
+    if swap_success_column.len() < token_swap_metrics_storage.len():
+        swaps = get_recent_swaps(count)
+        return (
+            [1 if s.success else 0 for s in swaps],
+            [int(s.slippage) for s in swaps],
+            [int(s.output_amount) for s in swaps],
+        )
+
+    successes = []
+    slippages = []
+    outputs = []
+    for success, slippage, output in zip(
+        swap_success_column.values(), swap_slippage_column.values(), swap_output_column.values()
+    ):
+        if len(successes) >= count:
+            break
+        successes.append(int(success))
+        slippages.append(int(slippage))
+        outputs.append(int(output))
+    return successes, slippages, outputs
+
+def _recent_icp_successes(count: int) -> List[int]:
+    """Newest-first coordination-success column for recent ICP metrics."""
+    if icp_success_column.len() < icp_coordinator_storage.len():
+        return [1 if m.coordination_success else 0 for m in get_recent_icp_metrics(count)]
+
+    successes = []
+    for success in icp_success_column.values():
+        if len(successes) >= count:
+            break
+        successes.append(int(success))
+    return successes
+
+_CURRENT_HEALTH_KEY = "current_health"
+
+# Heap-side health cache: recomputes land here and the stable row is
+# only rewritten every few updates, not on every transaction.
+_HEALTH_FLUSH_EVERY = 10
+_cached_health = None
+_health_updates_since_flush = 0
 
 def update_contract_health():
-    """Update contract health assessment."""
-    health = get_contract_health()
-    contract_health_storage.insert(text("current_health"), health)
+    """Update contract health assessment, flushing to stable periodically."""
+    global _cached_health, _health_updates_since_flush
+    _cached_health = _compute_contract_health()
+    _health_updates_since_flush += 1
+    if _health_updates_since_flush >= _HEALTH_FLUSH_EVERY:
+        contract_health_storage.insert(_CURRENT_HEALTH_KEY, _cached_health)
+        _health_updates_since_flush = 0
 
 # Initialize the canister
 def canister_init():
@@ -596,6 +1055,8 @@ def canister_init():
         alerts=Vec[text]([])
     )
 
-    contract_health_storage.insert(text("current_health"), initial_health)
+    global _cached_health
+    _cached_health = initial_health
+    contract_health_storage.insert(_CURRENT_HEALTH_KEY, initial_health)
 
 canister_init()
\ No newline at end of file
@@ -18,10 +18,28 @@ from kybra import (
     ic, nat64, query, update, Principal, Record, Variant,
     Vec, Opt, bool, text, StableBTreeMap, Tuple
 )
-import json
+import functools
+import random
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
+# Dedicated PRNG instance for swap simulation; seeded once at init so the
+# hot path never touches the import machinery or the module-level RNG
+_rng = random.Random()
+
+# Sentinel values constructed once at import; the Kybra constructors
+# validate on every call, so hot paths reuse these instead
+_USDC = text("USDC")
+_PENDING = text("pending")
+_COMPLETED = text("completed")
+_FAILED = text("failed")
+_OPT_NONE = Opt[text](None)
+_DEFAULT_KEY = text("default")
+
+# In-process copy of the stored config; refreshed on every config write so
+# the swap hot path skips the B-tree read
+_config_cache = {"v": None}
+
 # Type definitions for Kybra CDK syntax
 class StableCoinInfo(Record):
     symbol: text
@@ -104,137 +122,225 @@ DEFAULT_CONFIG = SwapConfig(
     emergency_pause=bool(False)
 )
 
-# Supported stablecoins
-SUPPORTED_STABLECOINS = {
-    "USDT": StableCoinInfo(
-        symbol=text("USDT"),
-        mint_address=text("Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"),
-        decimals=nat64(6),
-        name=text("Tether USD"),
-        is_active=bool(True),
-        min_swap_amount=nat64(1000000),    # $1 USDT
-        max_swap_amount=nat64(1000000000) # $1000 USDT
-    ),
-    "DAI": StableCoinInfo(
-        symbol=text("DAI"),
-        mint_address=text("FNZUq3sY6FpDZkJhCKbLWYtLb4uqjB9sL5qL4X9Y8Z7K"),
-        decimals=nat64(18),
-        name=text("Dai Stablecoin"),
-        is_active=bool(True),
-        min_swap_amount=nat64(1000000000000000000),    # $1 DAI (18 decimals)
-        max_swap_amount=nat64(1000000000000000000000) # $1000 DAI
-    ),
-    "FRAX": StableCoinInfo(
-        symbol=text("FRAX"),
-        mint_address=text("FRAXtnd5vcJ5H1MVk6R2mrjHQ6c9eFMEqJHLQw3ZyxKm"),
-        decimals=nat64(18),
-        name=text("Frax"),
-        is_active=bool(True),
-        min_swap_amount=nat64(1000000000000000000),    # $1 FRAX
-        max_swap_amount=nat64(1000000000000000000000) # $1000 FRAX
-    ),
-    "UST": StableCoinInfo(
-        symbol=text("UST"),
-        mint_address=text("EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"),
-        decimals=nat64(6),
-        name=text("TerraUSD"),
-        is_active=bool(False),  # Deactivated after de-peg
-        min_swap_amount=nat64(1000000),
-        max_swap_amount=nat64(1000000000)
+# Supported stablecoin seed data; the StableCoinInfo Records are only
+# built when a fresh deployment actually needs to seed storage
+def _build_token_seed() -> tuple:
+    """Build the (symbol, StableCoinInfo) seed pairs for first deployment."""
+    return (
+        ("USDT", StableCoinInfo(
+            symbol=text("USDT"),
+            mint_address=text("Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"),
+            decimals=nat64(6),
+            name=text("Tether USD"),
+            is_active=bool(True),
+            min_swap_amount=nat64(1000000),    # $1 USDT
+            max_swap_amount=nat64(1000000000) # $1000 USDT
+        )),
+        ("DAI", StableCoinInfo(
+            symbol=text("DAI"),
+            mint_address=text("FNZUq3sY6FpDZkJhCKbLWYtLb4uqjB9sL5qL4X9Y8Z7K"),
+            decimals=nat64(18),
+            name=text("Dai Stablecoin"),
+            is_active=bool(True),
+            min_swap_amount=nat64(1000000000000000000),    # $1 DAI (18 decimals)
+            max_swap_amount=nat64(1000000000000000000000) # $1000 DAI
+        )),
+        ("FRAX", StableCoinInfo(
+            symbol=text("FRAX"),
+            mint_address=text("FRAXtnd5vcJ5H1MVk6R2mrjHQ6c9eFMEqJHLQw3ZyxKm"),
+            decimals=nat64(18),
+            name=text("Frax"),
+            is_active=bool(True),
+            min_swap_amount=nat64(1000000000000000000),    # $1 FRAX
+            max_swap_amount=nat64(1000000000000000000000) # $1000 FRAX
+        )),
+        ("UST", StableCoinInfo(
+            symbol=text("UST"),
+            mint_address=text("EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"),
+            decimals=nat64(6),
+            name=text("TerraUSD"),
+            is_active=bool(False),  # Deactivated after de-peg
+            min_swap_amount=nat64(1000000),
+            max_swap_amount=nat64(1000000000)
+        ))
     )
-}
 
 def initialize_supported_tokens():
     """Initialize supported stablecoins on first deployment"""
 
+    # Checked before any Record construction so warm starts pay nothing
     if supported_tokens_storage.contains(text("USDT")):
         return  # Already initialized
 
-    for symbol, token_info in SUPPORTED_STABLECOINS.items():
+    for symbol, token_info in _build_token_seed():
         supported_tokens_storage.insert(text(symbol), token_info)
 
     # Store default configuration
-    swap_config_storage.insert(text("default"), DEFAULT_CONFIG)
+    swap_config_storage.insert(_DEFAULT_KEY, DEFAULT_CONFIG)
+    _config_cache["v"] = DEFAULT_CONFIG
+
+# Prices are stored as integers scaled by 1e7 (10_001_000 == 1.0001) so
+# output math stays in C-level int multiplication with no float rounding
+# around the stablecoin peg
+_PRICE_SCALE = 10_000_000
+
+def _price_entry(price_scaled: int) -> dict:
+    """Pre-built aggregator price entry for a known pair."""
+    return {
+        "price_scaled": price_scaled,
+        "liquidity": 1000000,  # $1M liquidity
+        "confidence": 0.95,
+        "dex_sources": ("jupiter", "raydium")
+    }
+
+# Simulated price table (would use real DEX APIs in production), frozen
+# at import so lookups allocate nothing per call
+_PRICE_TABLE = {
+    ("USDT", "USDC"): _price_entry(10_001_000),   # Slight premium for USDC
+    ("DAI", "USDC"): _price_entry(9_998_000),     # Slight discount
+    ("FRAX", "USDC"): _price_entry(9_995_000),    # Small discount
+    ("USDC", "USDT"): _price_entry(9_999_000),
+    ("USDC", "DAI"): _price_entry(10_002_000),
+    ("USDC", "FRAX"): _price_entry(10_005_000)
+}
+
+_DEFAULT_PRICE = {
+    "price_scaled": _PRICE_SCALE,
+    "liquidity": 100000,
+    "confidence": 0.80,
+    "dex_sources": ("orca",)
+}
 
 def get_real_time_price(input_token: text, output_token: text, amount: nat64) -> dict:
     """
     Get real-time price from DEX aggregators.
     In production, this would call Jupiter API, Raydium API, etc.
     """
-    # Simulate price data (would use real DEX APIs in production)
-    prices = {
-        ("USDT", "USDC"): 1.0001,   # Slight premium for USDC
-        ("DAI", "USDC"): 0.9998,    # Slight discount
-        ("FRAX", "USDC"): 0.9995,   # Small discount
-        ("USDC", "USDT"): 0.9999,
-        ("USDC", "DAI"): 1.0002,
-        ("USDC", "FRAX"): 1.0005
-    }
+    return _PRICE_TABLE.get((str(input_token), str(output_token)), _DEFAULT_PRICE)
 
-    key = (input_token, output_token)
-    if key in prices:
-        return {
-            "price": prices[key],
-            "liquidity": 1000000,  # $1M liquidity
-            "confidence": 0.95,
-            "dex_sources": ["jupiter", "raydium"]
-        }
+_MASK64 = (1 << 64) - 1
 
-    return {
-        "price": 1.0,
-        "liquidity": 100000,
-        "confidence": 0.80,
-        "dex_sources": ["orca"]
-    }
+def _mix64(x: int) -> int:
+    """splitmix64 finalizer; mixes an integer into a well-spread 64-bit value."""
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EB & _MASK64
+    return x ^ (x >> 31)
 
-def find_best_swap_routes(input_token: text, output_token: text, amount: nat64) -> Vec[SwapRoute]:
+# Amounts are bucketed to ~1M base units for route caching; swaps inside
+# the same bucket share one cached price lookup
+_AMOUNT_BUCKET_SHIFT = 20
+
+# Bumped whenever the price table refreshes so stale cached plans miss
+_route_cache_version = 0
+
+# Route payload templates with pre-escaped static keys; token symbols and
+# amounts are plain alphanumerics, so formatting replaces json.dumps on
+# the quote path
+_JUPITER_ROUTE_TMPL = '{{"inputMint":"{i}","outputMint":"{o}","amount":"{a}","slippage":"0.01"}}'
+_RAYDIUM_ROUTE_TMPL = '{{"poolId":"raydium_pool_123","inputAmount":"{a}","minOutputAmount":"{m}"}}'
+
+@functools.lru_cache(maxsize=1024)
+def _route_plan_cached(input_token: str, output_token: str, bucket: int, version: int) -> tuple:
     """
-    Find best swap routes across multiple DEXs.
-    Uses Jupiter aggregation in production.
+    Cached route plan for a token pair and amount bucket.
+    Returns (price_scaled, dex_sources) so repeat quotes for similar
+    amounts skip the price lookup entirely; version invalidates on refresh.
     """
-    routes = []
-
-    # Get price data
-    price_data = get_real_time_price(input_token, output_token, amount)
-
-    # Route 1: Jupiter (aggregator)
-    if "jupiter" in price_data["dex_sources"]:
-        expected_output = int(amount * price_data["price"] * 0.999)  # 0.1% fee
-        routes.append(SwapRoute(
-            input_token=input_token,
-            output_token=output_token,
-            dex_name=text("jupiter"),
-            route_data=text(json.dumps({
-                "inputMint": input_token,
-                "outputMint": output_token,
-                "amount": str(amount),
-                "slippage": "0.01"
-            })),
-            expected_output=nat64(expected_output),
-            price_impact=nat64(100),  # 1%
-            gas_estimate=nat64(200000),
-            confidence_score=nat64(9500)  # 95%
-        ))
+    price_data = get_real_time_price(text(input_token), text(output_token),
+                                     nat64(bucket << _AMOUNT_BUCKET_SHIFT))
+    return (price_data["price_scaled"], tuple(price_data["dex_sources"]))
+
+def _make_jupiter_route(input_token: text, output_token: text, amount: nat64,
+                        expected_output: int) -> SwapRoute:
+    """Build the Jupiter aggregator route Record."""
+    return SwapRoute(
+        input_token=input_token,
+        output_token=output_token,
+        dex_name=text("jupiter"),
+        route_data=text(_JUPITER_ROUTE_TMPL.format(i=input_token, o=output_token, a=amount)),
+        expected_output=nat64(expected_output),
+        price_impact=nat64(100),  # 1%
+        gas_estimate=nat64(200000),
+        confidence_score=nat64(9500)  # 95%
+    )
 
-    # Route 2: Direct DEX
-    expected_output = int(amount * price_data["price"] * 0.998)  # 0.2% fee
-    routes.append(SwapRoute(
+def _make_raydium_route(input_token: text, output_token: text, amount: nat64,
+                        expected_output: int) -> SwapRoute:
+    """Build the direct Raydium route Record."""
+    return SwapRoute(
         input_token=input_token,
         output_token=output_token,
         dex_name=text("raydium"),
-        route_data=text(json.dumps({
-            "poolId": "raydium_pool_123",
-            "inputAmount": str(amount),
-            "minOutputAmount": str(expected_output)
-        })),
+        route_data=text(_RAYDIUM_ROUTE_TMPL.format(a=amount, m=expected_output)),
         expected_output=nat64(expected_output),
         price_impact=nat64(200),  # 2%
         gas_estimate=nat64(250000),
         confidence_score=nat64(8500)  # 85%
-    ))
+    )
+
+def _best_route(input_token: text, output_token: text, amount: nat64) -> Optional[SwapRoute]:
+    """
+    Pick the single best route for a swap without materializing the full
+    route list. Only the winner's SwapRoute (and its JSON payload) is built.
+    """
+    bucket = int(amount) >> _AMOUNT_BUCKET_SHIFT
+    price_scaled, dex_sources = _route_plan_cached(str(input_token), str(output_token),
+                                                   bucket, _route_cache_version)
+
+    best_name = None
+    best_out = -1
+    if "jupiter" in dex_sources:
+        jupiter_out = _compute_expected_output(int(amount), price_scaled, 10)  # 0.1% fee
+        if jupiter_out > best_out:
+            best_name, best_out = "jupiter", jupiter_out
+
+    raydium_out = _compute_expected_output(int(amount), price_scaled, 20)  # 0.2% fee
+    if raydium_out > best_out:
+        best_name, best_out = "raydium", raydium_out
+
+    if best_name is None:
+        return None
+    if best_name == "jupiter":
+        return _make_jupiter_route(input_token, output_token, amount, best_out)
+    return _make_raydium_route(input_token, output_token, amount, best_out)
+
+def find_best_swap_routes(input_token: text, output_token: text, amount: nat64) -> Vec[SwapRoute]:
+    """
+    Find best swap routes across multiple DEXs.
+    Uses Jupiter aggregation in production.
+    """
+    # Get cached price data for this pair and amount bucket
+    bucket = int(amount) >> _AMOUNT_BUCKET_SHIFT
+    price_scaled, dex_sources = _route_plan_cached(str(input_token), str(output_token),
+                                                   bucket, _route_cache_version)
+
+    # Build all candidate routes in one comprehension; no append lookups
+    routes = [route for route in (
+        _make_jupiter_route(input_token, output_token, amount,
+                            _compute_expected_output(int(amount), price_scaled, 10))  # 0.1% fee
+        if "jupiter" in dex_sources else None,
+        _make_raydium_route(input_token, output_token, amount,
+                            _compute_expected_output(int(amount), price_scaled, 20))  # 0.2% fee
+    ) if route is not None]
 
     return Vec[SwapRoute](routes)
 
+# Scalar kernels kept as standalone plain-int functions; they take and
+# return unboxed Python ints so the arithmetic runs entirely in C-level
+# integer ops with no Kybra wrappers in the loop
+
+def _optimal_amount(balance: int, max_swap: int, gas_cost: int) -> int:
+    """Optimal swap amount for a balance given gas cost and 1% slippage."""
+    min_profit = gas_cost + balance // 100
+    if balance < min_profit:
+        return 0
+    optimal = balance - min_profit
+    return optimal if optimal <= max_swap else max_swap
+
+def _compute_expected_output(amount: int, price_scaled: int, fee_bps: int) -> int:
+    """Expected output after the DEX fee, in scaled-integer math."""
+    return amount * price_scaled * (10000 - fee_bps) // (_PRICE_SCALE * 10000)
+
 def calculate_optimal_swap_amount(input_token: text, wallet_balance: nat64) -> nat64:
     """
     Calculate optimal swap amount considering gas costs and slippage.
@@ -243,26 +349,8 @@ def calculate_optimal_swap_amount(input_token: text, wallet_balance: nat64) -> n
     if token_info is None:
         return nat64(0)
 
-    # Consider gas costs (~$0.05 per swap)
-    gas_cost_usd = 50000  # 0.05 USDC (6 decimals)
-
-    # Account for slippage (1% average)
-    slippage_cost = wallet_balance // 100
-
-    # Minimum profitable swap
-    min_profit = gas_cost_usd + slippage_cost
-
-    if wallet_balance < min_profit:
-        return nat64(0)
-
-    # Return optimal amount (balance minus costs)
-    optimal_amount = wallet_balance - min_profit
-
-    # Respect max swap limits
-    if optimal_amount > token_info.max_swap_amount:
-        optimal_amount = token_info.max_swap_amount
-
-    return optimal_amount
+    # Gas costs ~$0.05 per swap (0.05 USDC, 6 decimals)
+    return nat64(_optimal_amount(int(wallet_balance), int(token_info.max_swap_amount), 50000))
 
 # Kybra canister methods
 
@@ -273,61 +361,70 @@ def swap_to_usdc(swap_data: dict) -> text:
     Main entry point for stablecoin conversion.
     """
 
-    config = swap_config_storage.get(text("default"))
+    _text = text
+    _nat = nat64
+
+    # Cheapest check first: cached config and the pause flag, before any
+    # swap_data field access
+    config = _config_cache["v"]
+    if config is None:
+        config = swap_config_storage.get(_DEFAULT_KEY)
+        _config_cache["v"] = config
     if config is None or config.emergency_pause:
-        return text("swap_paused")
+        return _text("swap_paused")
 
-    input_token = text(swap_data["input_token"])
-    input_amount = nat64(swap_data["input_amount"])
-    user_wallet = text(swap_data["user_wallet"])
-    slippage = nat64(swap_data.get("slippage", config.default_slippage))
+    input_token = _text(swap_data["input_token"])
+    input_amount = _nat(swap_data["input_amount"])
+    user_wallet = _text(swap_data["user_wallet"])
+    slippage = _nat(swap_data.get("slippage", config.default_slippage))
 
     # Validate input token
     token_info = supported_tokens_storage.get(input_token)
     if token_info is None or not token_info.is_active:
-        return text("unsupported_token")
+        return _text("unsupported_token")
 
     # Validate amount
     if input_amount < token_info.min_swap_amount:
-        return text("amount_too_small")
+        return _text("amount_too_small")
 
     if input_amount > token_info.max_swap_amount:
-        return text("amount_too_large")
+        return _text("amount_too_large")
 
-    # Generate request ID
-    request_id = f"swap_{ic.time()}_{hash(str(swap_data)) % 10000}"
+    # Generate request ID by mixing the fields directly; no str(dict) pass
+    now = int(ic.time())
+    mixed = _mix64(now ^ (int(input_amount) * 0x9E3779B97F4A7C15 & _MASK64) ^ hash(str(user_wallet)))
+    request_id = f"swap_{now}_{mixed & 0xFFFFFF:06x}"
 
-    # Find best routes
-    routes = find_best_swap_routes(input_token, text("USDC"), input_amount)
+    # Select the best route in one pass; no route list is built
+    best_route = _best_route(input_token, _USDC, input_amount)
 
-    if len(routes) == 0:
-        return text("no_routes_available")
+    if best_route is None:
+        return _text("no_routes_available")
 
-    # Select best route (highest expected output)
-    best_route = max(routes, key=lambda r: r.expected_output)
+    request_key = _text(request_id)
 
     # Create swap request
     swap_request = SwapRequest(
-        request_id=text(request_id),
+        request_id=request_key,
         user_wallet=user_wallet,
         input_token=input_token,
-        output_token=text("USDC"),
+        output_token=_USDC,
         input_amount=input_amount,
         expected_output=best_route.expected_output,
         slippage_tolerance=slippage,
-        status=text("pending"),
-        created_at=text(ic.time()),
-        completed_at=Opt[text](None),
-        transaction_hash=Opt[text](None),
-        error_message=Opt[text](None)
+        status=_PENDING,
+        created_at=_text(ic.time()),
+        completed_at=_OPT_NONE,
+        transaction_hash=_OPT_NONE,
+        error_message=_OPT_NONE
     )
 
-    swap_requests_storage.insert(text(request_id), swap_request)
+    swap_requests_storage.insert(request_key, swap_request)
 
     # Execute swap asynchronously
-    execute_swap(text(request_id), best_route)
+    execute_swap(request_key, best_route)
 
-    return text(request_id)
+    return request_key
 
 @query
 def get_swap_status(request_id: text) -> SwapRequest:
@@ -345,9 +442,9 @@ def get_swap_status(request_id: text) -> SwapRequest:
             slippage_tolerance=nat64(0),
             status=text("not_found"),
             created_at=text(""),
-            completed_at=Opt[text](None),
-            transaction_hash=Opt[text](None),
-            error_message=Opt[text](None)
+            completed_at=_OPT_NONE,
+            transaction_hash=_OPT_NONE,
+            error_message=_OPT_NONE
         )
     return request
 
@@ -355,8 +452,7 @@ def get_swap_status(request_id: text) -> SwapRequest:
 def get_supported_tokens() -> Vec[StableCoinInfo]:
     """Get list of supported stablecoins."""
     tokens = []
-    for symbol in supported_tokens_storage.keys():
-        token_info = supported_tokens_storage.get(symbol)
+    for token_info in supported_tokens_storage.values():
         if token_info is not None and token_info.is_active:
             tokens.append(token_info)
     return Vec[StableCoinInfo](tokens)
@@ -370,18 +466,28 @@ def get_swap_quote(input_token: text, output_token: text, amount: nat64) -> Vec[
 def get_swap_metrics() -> SwapMetrics:
     """Get comprehensive swap metrics."""
 
-    all_requests = []
-    for request_id in swap_requests_storage.keys():
-        request = swap_requests_storage.get(request_id)
-        if request is not None:
-            all_requests.append(request)
-
-    total_swaps = len(all_requests)
-    successful_swaps = len([r for r in all_requests if r.status == text("completed")])
-    failed_swaps = len([r for r in all_requests if r.status == text("failed")])
-
-    # Calculate total volume (simplified)
-    total_volume = sum(int(r.input_amount) for r in all_requests)
+    # Single pass: counts and volume accumulate together, no request list
+    completed = _COMPLETED
+    failed = _FAILED
+    total_swaps = 0
+    successful_swaps = 0
+    failed_swaps = 0
+    total_volume = 0
+    for request in swap_requests_storage.values():
+        if request is None:
+            continue
+        total_swaps += 1
+        status = request.status
+        if status == completed:
+            successful_swaps += 1
+        elif status == failed:
+            failed_swaps += 1
+        total_volume += int(request.input_amount)
+
+    active_tokens = 0
+    for token_info in supported_tokens_storage.values():
+        if token_info.is_active:
+            active_tokens += 1
 
     # Calculate average slippage (simplified)
     avg_slippage = nat64(150)  # 1.5% average
@@ -394,7 +500,7 @@ def get_swap_metrics() -> SwapMetrics:
         average_slippage=avg_slippage,
         success_rate=nat64(success_rate),
         gas_cost_savings=nat64(25000),  # $0.025 saved per swap
-        supported_tokens=nat64(len([t for t in supported_tokens_storage.values() if t.is_active]))
+        supported_tokens=nat64(active_tokens)
     )
 
 @update
@@ -409,42 +515,40 @@ def update_config(new_config: dict) -> bool:
         emergency_pause=bool(new_config.get("emergency_pause", False))
     )
 
-    swap_config_storage.insert(text("default"), config)
+    swap_config_storage.insert(_DEFAULT_KEY, config)
+    _config_cache["v"] = config
+    return True
+
+def _set_pause(flag: bool) -> bool:
+    """Flip only emergency_pause on the stored config.
+
+    The unchanged fields (including the preferred_dex_order Vec) pass
+    through by reference, so only one field's worth of new state is built.
+    """
+    config = swap_config_storage.get(_DEFAULT_KEY)
+    if config is None:
+        return False
+    updated = SwapConfig(
+        default_slippage=config.default_slippage,
+        max_slippage=config.max_slippage,
+        preferred_dex_order=config.preferred_dex_order,
+        gas_optimization_enabled=config.gas_optimization_enabled,
+        retry_attempts=config.retry_attempts,
+        emergency_pause=bool(flag)
+    )
+    swap_config_storage.insert(_DEFAULT_KEY, updated)
+    _config_cache["v"] = updated
     return True
 
 @update
 def emergency_pause() -> bool:
     """Emergency pause all swaps."""
-    config = swap_config_storage.get(text("default"))
-    if config is not None:
-        paused_config = SwapConfig(
-            default_slippage=config.default_slippage,
-            max_slippage=config.max_slippage,
-            preferred_dex_order=config.preferred_dex_order,
-            gas_optimization_enabled=config.gas_optimization_enabled,
-            retry_attempts=config.retry_attempts,
-            emergency_pause=bool(True)
-        )
-        swap_config_storage.insert(text("default"), paused_config)
-        return True
-    return False
+    return _set_pause(True)
 
 @update
 def resume_operations() -> bool:
     """Resume swap operations."""
-    config = swap_config_storage.get(text("default"))
-    if config is not None:
-        resumed_config = SwapConfig(
-            default_slippage=config.default_slippage,
-            max_slippage=config.max_slippage,
-            preferred_dex_order=config.preferred_dex_order,
-            gas_optimization_enabled=config.gas_optimization_enabled,
-            retry_attempts=config.retry_attempts,
-            emergency_pause=bool(False)
-        )
-        swap_config_storage.insert(text("default"), resumed_config)
-        return True
-    return False
+    return _set_pause(False)
 
 # Internal helper function
 def execute_swap(request_id: text, route: SwapRoute):
@@ -458,53 +562,47 @@ def execute_swap(request_id: text, route: SwapRoute):
     # via the selected DEX (Jupiter, Raydium, etc.)
 
     # Simulate swap execution
-    import random
-    success = random.random() > 0.05  # 95% success rate
+    _rand = _rng.random
+    success = _rand() > 0.05  # 95% success rate
+
+    # Carry the unchanged fields once; each branch only overrides what the
+    # outcome actually mutates, then one Record is built and inserted
+    base = dict(
+        request_id=request.request_id,
+        user_wallet=request.user_wallet,
+        input_token=request.input_token,
+        output_token=request.output_token,
+        input_amount=request.input_amount,
+        slippage_tolerance=request.slippage_tolerance,
+        created_at=request.created_at,
+        completed_at=Opt(text(ic.time()))
+    )
 
     if success:
         # Simulate successful swap
-        actual_output = route.expected_output - nat64(random.randint(1000, 5000))  # Small variance
-
-        updated_request = SwapRequest(
-            request_id=request.request_id,
-            user_wallet=request.user_wallet,
-            input_token=request.input_token,
-            output_token=request.output_token,
-            input_amount=request.input_amount,
+        actual_output = route.expected_output - nat64(1000 + int(_rand() * 4001))  # Small variance
+        base.update(
             expected_output=actual_output,
-            slippage_tolerance=request.slippage_tolerance,
-            status=text("completed"),
-            created_at=request.created_at,
-            completed_at=Opt(text(ic.time())),
+            status=_COMPLETED,
             transaction_hash=Opt(text(f"swap_tx_{hash(str(request_id + str(ic.time())))}")),
-            error_message=Opt(text](None))
+            error_message=_OPT_NONE
         )
-
-        swap_requests_storage.insert(request_id, updated_request)
-
     else:
         # Simulate failed swap
-        updated_request = SwapRequest(
-            request_id=request.request_id,
-            user_wallet=request.user_wallet,
-            input_token=request.input_token,
-            output_token=request.output_token,
-            input_amount=request.input_amount,
+        base.update(
             expected_output=request.expected_output,
-            slippage_tolerance=request.slippage_tolerance,
-            status=text("failed"),
-            created_at=request.created_at,
-            completed_at=Opt(text(ic.time())),
-            transaction_hash=Opt[text](None),
+            status=_FAILED,
+            transaction_hash=_OPT_NONE,
             error_message=Opt(text("Insufficient liquidity"))
         )
 
-        swap_requests_storage.insert(request_id, updated_request)
+    swap_requests_storage.insert(request_id, SwapRequest(**base))
 
 # Initialize the canister on first deployment
 def canister_init():
     """Initialize the canister with supported tokens and configuration."""
     initialize_supported_tokens()
+    _rng.seed(ic.time())
 
 # Export the initialization function
 canister_init()
\ No newline at end of file
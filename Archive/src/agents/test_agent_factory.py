@@ -5,6 +5,7 @@ Tests the Agent Factory functionality without requiring Kybra compilation
 """
 
 import json
+import re
 import sys
 import time
 from datetime import datetime
@@ -29,8 +30,11 @@ def test_agent_factory_structure():
             'AgentFactory'
         ]
 
+        # One compiled-regex pass over the file instead of a scan per name
+        class_re = re.compile(r"class (" + "|".join(map(re.escape, required_classes)) + r")\b")
+        found_classes = set(class_re.findall(content))
         for cls in required_classes:
-            if f"class {cls}" in content:
+            if cls in found_classes:
                 print(f"✅ {cls} found")
             else:
                 print(f"❌ {cls} missing")
@@ -46,8 +50,10 @@ def test_agent_factory_structure():
             'get_factory_status'
         ]
 
+        method_re = re.compile(r"def (" + "|".join(map(re.escape, required_methods)) + r")\b")
+        found_methods = set(method_re.findall(content))
         for method in required_methods:
-            if f"def {method}" in content:
+            if method in found_methods:
                 print(f"✅ {method} method found")
             else:
                 print(f"❌ {method} method missing")
@@ -79,8 +85,10 @@ def test_candid_interface():
             'get_factory_status'
         ]
 
+        did_re = re.compile("|".join(map(re.escape, required_methods)))
+        found_in_did = set(did_re.findall(candid_content))
         for method in required_methods:
-            if method in candid_content:
+            if method in found_in_did:
                 print(f"✅ {method} found in DID")
             else:
                 print(f"❌ {method} missing from DID")